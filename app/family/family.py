@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+import multiprocessing
 import os
 
+import numpy as np
+
 from app.family.member import Member
+from app.model.algebra import Algebra
+from app.model.batchquantumstate import BatchQuantumState
 from app.model.gates import EnumGates
 from app.model.quantumstate import QuantumState
 from app.model.sequence import Sequence
@@ -12,12 +18,18 @@ __author__ = 'Rafael Martin-Cuevas Redondo'
 
 class Family:
 
-    def __init__(self, length, max_complexity):
+    # Largest number of amplitudes held at once by the children of a batch of members.
+    BATCH_AMPLITUDES = pow(2, 22)
+
+    def __init__(self, length, max_complexity, partial=False, processes=1):
         """
         Sets a list (family) of n-qubits, given a certain length.
 
         :param length: Length (n) of the n-qubit.
         :param max_complexity: Max complexity to reach in the family.
+        :param partial: Whether gates may also be partially controlled, through wildcards.
+        :param processes: Number of processes among which each level of complexity is expanded.
+            Results are the same as with a single one, which expands them in this process.
         """
 
         if not isinstance(length, int):
@@ -28,13 +40,21 @@ class Family:
             raise TypeError('The second parameter must be a whole number.')
         elif max_complexity <= 0:
             raise ValueError('The second parameter must be positive')
+        if not isinstance(partial, bool):
+            raise TypeError('The third parameter must be a boolean.')
+        if not isinstance(processes, int):
+            raise TypeError('The fourth parameter must be a whole number.')
+        elif processes <= 0:
+            raise ValueError('The fourth parameter must be positive')
         else:
             self._length = length
+            self._partial = partial
+            self._processes = processes
             self._list = {}
 
             for i in range(pow(2, self.length)):
                 new_node = Member(len(self._list), QuantumState(self.length, i))
-                self._list[str(new_node.nqubit)] = new_node
+                self._list[new_node.nqubit.key] = new_node
 
             self._allowed_gates = [
                 EnumGates.V.gate,
@@ -45,6 +65,7 @@ class Family:
                 EnumGates.H.gate,
                 EnumGates.H_sym.gate
             ]
+            self._algebra = Algebra(self._allowed_gates)
 
             self._generate(max_complexity)
 
@@ -56,15 +77,31 @@ class Family:
         """
         return self._length
 
+    @property
+    def partial(self):
+        """
+        partial is a property
+        This is the getter method
+        """
+        return self._partial
+
+    @property
+    def processes(self):
+        """
+        processes is a property
+        This is the getter method
+        """
+        return self._processes
+
     def _contains(self, nqubit):
         """
         Determines whether a n-qubit is contained in the list.
 
-        :param nqubit: n-qubit to look for.
-        :return: Integer of its position if the n-qubit is in the list, -1 otherwise.
+        :param nqubit: Key of the n-qubit to look for.
+        :return: True if the n-qubit is in the list, False otherwise.
         """
 
-        return str(nqubit) in self._list
+        return nqubit in self._list
 
     def _filename(self, complexity):
         """
@@ -75,39 +112,196 @@ class Family:
 
         return 'data/Q_n' + str(self.length) + '_c' + str(complexity) + '.csv'
 
-    def _generate_from_parent(self, parent_id, gate, next_nodes, complexity):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _table(gate, length, partial):
+        """
+        Gives the operations of all sequences in which a gate can be applied, in the same order as
+        Sequence.generate_all_with_gate(), wildcards included if the family is partial. Built once per
+        gate, for every family of the same kind, and once per process.
+        Gates that can not use controls only keep the first sequence for each target: the rest differ
+        on their controls alone, so they lead to the very same n-qubits.
+
+        :param gate: Gate to be applied.
+        :param length: Length of the n-qubits.
+        :param partial: Whether gates may also be partially controlled.
+        :return: Tuple of tuples, each with the index of the sequence, the bit position of its target,
+            its control bits and the value they must have.
         """
-        Generates all children from a given parent nqubit.
 
-        :param parent_id: Id from the parent node, as its nqubit string representation.
-        :param gate: Gate to be applied to the parent node.
+        targets, masks, values = Sequence.table(gate, length, partial)
+
+        if gate.controllable:
+            rows = zip(range(len(targets)), targets.tolist(), masks.tolist(), values.tolist())
+        else:
+            rows = zip(range(length), targets[:length].tolist(), [0] * length, [0] * length)
+
+        return tuple(rows)
+
+    @staticmethod
+    def _batch_size(gate, length, partial):
+        """
+        Decides how many members are expanded at once with a gate, so that their children do not hold
+        more than BATCH_AMPLITUDES amplitudes.
+
+        :param gate: Gate to be applied.
+        :param length: Length of the n-qubits.
+        :param partial: Whether gates may also be partially controlled.
+        :return: Number of members.
+        """
+
+        return max(1, Family.BATCH_AMPLITUDES // (pow(2, length) * len(Family._table(gate, length, partial))))
+
+    @staticmethod
+    def _children(parents, gate, length, partial, redundant):
+        """
+        Applies a gate in every possible way to many n-qubits at once. Repeated children are told apart
+        by their coefficients, with Numpy, and only the key of the first occurrence of each one is built.
+        N-qubits of SPARSE_LENGTH qubits or more are expanded one at a time instead, on their own sparse
+        form, as stacking them would store all of their amplitudes.
+
+        :param parents: List of n-qubits to which the gate is to be applied. They are left as they were.
+        :param gate: Gate to be applied.
+        :param length: Length of the n-qubits.
+        :param partial: Whether gates may also be partially controlled.
+        :param redundant: List with the operation to be skipped for each n-qubit, as given by
+            _redundant(), or None.
+        :return: Generator of tuples, with the position of the parent, the index of the sequence, the key
+            of the resulting n-qubit and its level, in the same order as applying the gate to one parent
+            at a time.
+        """
+
+        table = Family._table(gate, length, partial)
+
+        if length >= QuantumState.SPARSE_LENGTH:
+            found = set()
+
+            for i, parent in enumerate(parents):
+                for index, target, control_mask, control_value in table:
+                    if redundant[i] != (target, control_mask, control_value):
+                        child = parent.copy()
+                        child.apply_operation(gate.parts, target, control_mask, control_value, gate.norm_shift)
+                        key = child.key
+
+                        if key not in found:
+                            found.add(key)
+                            yield i, index, key, child.level
+        else:
+            operations = [row[1:] for row in table]
+            positions = {operation: j for j, operation in enumerate(operations)}
+
+            children = BatchQuantumState(parents).expand(gate.parts, operations, gate.norm_shift)
+
+            # Operations that can only lead back to n-qubits already in the family are left out.
+            rows = np.ones(len(children), dtype=bool)
+            for i, operation in enumerate(redundant):
+                if operation in positions:
+                    rows[i * len(operations) + positions[operation]] = False
+
+            for position in children.distinct(rows).tolist():
+                yield position // len(operations), table[position % len(operations)][0], children[position].key, \
+                    int(children.levels[position])
+
+    @staticmethod
+    def _expand(task):
+        """
+        Expands a batch of members with a single gate, in a worker process. Only compact records are
+        sent back: children are found by their keys, which already hold the whole n-qubits.
+
+        :param task: Tuple with the length of the family, whether it is partial, the gate, the keys of the
+            parent n-qubits and the operation to be skipped for each of them.
+        :return: List of records, each with the position of the parent, the key of a child, the index of
+            its sequence and the level difference with its parent. Only the first record of each key
+            is kept.
+        """
+
+        length, partial, gate, parent_keys, redundant = task
+        parents = [QuantumState.from_key(k, length) for k in parent_keys]
+
+        return [(i, key, index, level - parents[i].level)
+                for i, index, key, level in Family._children(parents, gate, length, partial, redundant)]
+
+    def _redundant(self, parent, gate):
+        """
+        Finds the operation of a gate that can only lead a member to an n-qubit already in the family.
+        That is the case when the gate, applied as the operation that produced the member, composes with
+        the gate of that operation into the identity, which gives back the parent of the member, or
+        into another allowed gate, which was already applied to that parent in the same way.
+
+        :param parent: Member to which the gate is to be applied.
+        :param gate: Gate to be applied.
+        :return: Tuple with the bit position of the target, the control bits and their value, or None.
+        """
+
+        result = None
+
+        if parent.sequence is not None:
+            product = self._algebra.product(parent.sequence.get_gate(), gate)
+
+            if product is not None:
+                composed, shift = product
+                operation = parent.sequence.get_operation()
+
+                if operation[1] != 0:
+                    # Controlled gates scale some amplitudes only, so the product must be exact.
+                    if shift == 0 and (composed is self._algebra.identity or composed.controllable):
+                        result = operation
+                elif composed is self._algebra.identity or not composed.controllable \
+                        or self._partial or self.length == 1:
+                    result = operation
+
+        return result
+
+    def _merge(self, parent_ids, gate, records, next_nodes, complexity):
+        """
+        Adds the children found by a worker process, as _generate_in_batches() would have done.
+
+        :param parent_ids: Ids from the parent nodes, as the keys of their nqubits.
+        :param gate: Gate applied to the parent nodes.
+        :param records: Records given by _expand(), in the order the children were found.
         :param next_nodes: List of nodes for next level of complexity.
         :param complexity: Current complexity.
         """
 
-        for seq in Sequence.generate_all_with_gate(gate, self.length):
-            nqubit = self._list[parent_id].nqubit.copy()
-            nqubit.apply_gate(seq)
+        for i, key, index, delta in records:
+            if not self._contains(key):
+                self._add(self._list[parent_ids[i]], gate, index, key, QuantumState.from_key(key, self.length),
+                          delta, next_nodes, complexity)
 
-            if not self._contains(nqubit):
-                new_node = Member(len(self._list), nqubit, self._list[parent_id].identifier,
-                                  gate.identifier, seq, self._list[parent_id].complexity + 1)
-                self._list[str(new_node.nqubit)] = new_node
+    def _add(self, parent, gate, index, key, nqubit, delta, next_nodes, complexity):
+        """
+        Adds a new member to the family, and exports it to file.
+
+        :param parent: Parent member.
+        :param gate: Gate applied to the parent.
+        :param index: Index of the sequence, in the order given by Sequence.generate_all_with_gate().
+        :param key: Key of the new n-qubit.
+        :param nqubit: New n-qubit.
+        :param delta: Level difference between the new n-qubit and its parent.
+        :param next_nodes: List of nodes for next level of complexity.
+        :param complexity: Current complexity.
+        """
 
-                # Export to file
-                file_name = self._filename(complexity + 1)
-                if os.path.isfile(file_name):
-                    output = open(file_name, 'a')
-                else:
-                    output = open(file_name, 'w')
-                output.write(new_node.to_file() + ';')
+        # Sequences are only built for the children that are kept.
+        seq = Sequence.from_index(gate, self.length, index, self._partial)
+        new_node = Member(len(self._list), nqubit, parent.identifier,
+                          gate.identifier, seq, parent.complexity + 1)
+        self._list[key] = new_node
 
-                output.write(str(nqubit.level - self._list[parent_id].nqubit.level))
+        # Export to file
+        file_name = self._filename(complexity + 1)
+        if os.path.isfile(file_name):
+            output = open(file_name, 'a')
+        else:
+            output = open(file_name, 'w')
+        output.write(new_node.to_file() + ';')
 
-                output.write('\n')
-                output.close()
+        output.write(str(delta))
 
-                next_nodes.append(str(nqubit))
+        output.write('\n')
+        output.close()
+
+        next_nodes.append(key)
 
     def _generate(self, max_complexity):
         """
@@ -125,6 +319,28 @@ class Family:
                 output.write(self._list[i].to_file() + '\n')
             output.close()
 
+        # Workers are kept for the whole generation, as every level needs them.
+        pool = None
+        if self._processes > 1:
+            pool = multiprocessing.Pool(self._processes)
+
+        try:
+            self._generate_levels(nodes, complexity, max_complexity, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def _generate_levels(self, nodes, complexity, max_complexity, pool):
+        """
+        Expands the family, one level of complexity at a time.
+
+        :param nodes: Keys of the members of the current complexity.
+        :param complexity: Current complexity.
+        :param max_complexity: Max complexity to reach in the family.
+        :param pool: Pool of worker processes, or None to expand every member in this process.
+        """
+
         while complexity < max_complexity and len(nodes) > 0:
 
             next_nodes = []
@@ -142,14 +358,67 @@ class Family:
             output.write('id;nqubit;k;parent_id;gate;sequence;delta(k)\n')
             output.close()
 
-            for g in self._allowed_gates:
-                for n in nodes:
-                    self._generate_from_parent(n, g, next_nodes, complexity)
+            if pool is None:
+                self._generate_in_batches(nodes, next_nodes, complexity)
+            else:
+                self._generate_in_pool(pool, nodes, next_nodes, complexity)
 
             self._count_members(complexity)
             nodes = next_nodes
             complexity += 1
 
+    def _generate_in_batches(self, nodes, next_nodes, complexity):
+        """
+        Expands a whole level of complexity in this process, applying each gate in every possible way to
+        many members at once. Children are looked up in the family in the same order the members would
+        be expanded one by one, so that every id is the same.
+
+        :param nodes: Keys of the members of the current complexity.
+        :param next_nodes: List of nodes for next level of complexity.
+        :param complexity: Current complexity.
+        """
+
+        for g in self._allowed_gates:
+            size = Family._batch_size(g, self.length, self._partial)
+
+            for start in range(0, len(nodes), size):
+                parents = [self._list[n] for n in nodes[start:start + size]]
+                redundant = [self._redundant(p, g) for p in parents]
+
+                for i, index, key, level in Family._children([p.nqubit for p in parents], g, self.length,
+                                                             self._partial, redundant):
+                    if not self._contains(key):
+                        # Members are stored in the canonical form of their keys, as merged ones are.
+                        self._add(parents[i], g, index, key, QuantumState.from_key(key, self.length),
+                                  level - parents[i].nqubit.level, next_nodes, complexity)
+
+    def _generate_in_pool(self, pool, nodes, next_nodes, complexity):
+        """
+        Expands a whole level of complexity among worker processes. Each task is a batch of members with a
+        single gate, expanded as _generate_in_batches() does, and results are merged in the same order
+        the members would be expanded here, so that the first child found for each n-qubit, and thus
+        every id, is the same.
+
+        :param pool: Pool of worker processes.
+        :param nodes: Keys of the members of the current complexity.
+        :param next_nodes: List of nodes for next level of complexity.
+        :param complexity: Current complexity.
+        """
+
+        # A few batches per process, so that they stay busy even if some batches take longer.
+        tasks = []
+        for g in self._allowed_gates:
+            size = min(Family._batch_size(g, self.length, self._partial),
+                       max(1, -(-len(nodes) // (4 * self._processes))))
+            tasks += [(g, nodes[start:start + size]) for start in range(0, len(nodes), size)]
+
+        # Built beforehand, as the pool reads them from another thread while members are being added.
+        arguments = [(self.length, self._partial, g, batch, [self._redundant(self._list[n], g) for n in batch])
+                     for g, batch in tasks]
+
+        for (g, batch), records in zip(tasks, pool.imap(Family._expand, arguments)):
+            self._merge(batch, g, records, next_nodes, complexity)
+
     def _count_members(self, complexity):
         """
         Counts all family members for a given complexity, and prints the result.
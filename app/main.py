@@ -4,6 +4,7 @@ import time
 from app.family.family import Family
 from app.view.view import View
 
+from app.model.circuit import Circuit
 from app.model.gates import EnumGates
 from app.model.quantumstate import QuantumState
 from app.model.sequence import Sequence
@@ -19,38 +20,41 @@ def main():
     hadamard = EnumGates.H.gate
     v_gate = EnumGates.V.gate
 
+    # Hadamard gates on every qubit, compiled once as they are applied over and over.
+    hadamards = Circuit([
+        Sequence('0', '0', '0', '0', hadamard),
+        Sequence('0', '0', '0', hadamard, '0'),
+        Sequence('0', '0', hadamard, '0', '0'),
+        Sequence('0', hadamard, '0', '0', '0'),
+        Sequence(hadamard, '0', '0', '0', '0')
+    ])
+    first_step = Circuit([
+        Sequence('0', '0', '0', '0', v_gate),
+        Sequence('0', '0', '0', '0', hadamard)
+    ])
+    second_step = Circuit([
+        Sequence('0', '0', '0', hadamard, '0'),
+        Sequence('0', '0', '0', '0', v_gate)
+    ])
+
     nqubit = QuantumState(5, state=0)
     View.display(str(nqubit.level) + '. ' + str(nqubit.vector))
 
-    nqubit.apply_gate(Sequence('0', '0', '0', '0', hadamard))
-    nqubit.apply_gate(Sequence('0', '0', '0', hadamard, '0'))
-    nqubit.apply_gate(Sequence('0', '0', hadamard, '0', '0'))
-    nqubit.apply_gate(Sequence('0', hadamard, '0', '0', '0'))
-    nqubit.apply_gate(Sequence(hadamard, '0', '0', '0', '0'))
+    hadamards.run(nqubit)
     View.display(str(nqubit.level) + '. ' + str(nqubit.vector))
 
     nqubit.apply_gate(Sequence('0', '0', '0', '0', v_gate))
 
-    nqubit.apply_gate(Sequence('0', '0', '0', '0', hadamard))
-    nqubit.apply_gate(Sequence('0', '0', '0', hadamard, '0'))
-    nqubit.apply_gate(Sequence('0', '0', hadamard, '0', '0'))
-    nqubit.apply_gate(Sequence('0', hadamard, '0', '0', '0'))
-    nqubit.apply_gate(Sequence(hadamard, '0', '0', '0', '0'))
+    hadamards.run(nqubit)
     View.display(str(nqubit.level) + '. ' + str(nqubit.vector))
 
     for i in range(20):
-        nqubit.apply_gate(Sequence('0', '0', '0', '0', v_gate))
-        nqubit.apply_gate(Sequence('0', '0', '0', '0', hadamard))
+        first_step.run(nqubit)
         View.display('=' + str(nqubit.level) + '. ' + str(nqubit.vector))
-        nqubit.apply_gate(Sequence('0', '0', '0', hadamard, '0'))
-        nqubit.apply_gate(Sequence('0', '0', '0', '0', v_gate))
+        second_step.run(nqubit)
         View.display('=' + str(nqubit.level) + '. ' + str(nqubit.vector))
 
-        nqubit.apply_gate(Sequence('0', '0', '0', '0', hadamard))
-        nqubit.apply_gate(Sequence('0', '0', '0', hadamard, '0'))
-        nqubit.apply_gate(Sequence('0', '0', hadamard, '0', '0'))
-        nqubit.apply_gate(Sequence('0', hadamard, '0', '0', '0'))
-        nqubit.apply_gate(Sequence(hadamard, '0', '0', '0', '0'))
+        hadamards.run(nqubit)
         View.display(str(nqubit.level) + '. ' + str(nqubit.vector))
 
     View.display("--- " + str(time.time() - start_time) + " seconds ---")
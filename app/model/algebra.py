@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from app.model.quantumgate import QuantumGate
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class Algebra:
+
+    def __init__(self, gates):
+        """
+        Precomputes how a set of gates compose with each other, so that chains of them can be
+        recognised without applying them. Two gates compose into a third one whenever the product of
+        their matrices is that third matrix times a power of two. Such powers make no difference once
+        n-qubits are simplified, as long as the gates are applied to the whole vector.
+
+        :param gates: List of gates, all of them on the same number of qubits.
+        """
+
+        if not isinstance(gates, list) or not all(isinstance(g, QuantumGate) for g in gates):
+            raise TypeError('The parameter must be a list of QuantumGate instances.')
+        elif len(gates) == 0:
+            raise ValueError('The list of gates can not be empty.')
+        elif any(g.length != gates[0].length for g in gates):
+            raise ValueError('All gates must have the same length.')
+        else:
+            self._gates = list(gates)
+            self._identity = QuantumGate(np.matrix(np.identity(pow(2, gates[0].length), dtype=np.complex_)), 'I')
+
+            # Products are keyed by the codes of both gates, in the order they are applied.
+            self._products = {}
+            self._inverses = {}
+
+            for first in self._gates:
+                for second in self._gates:
+                    product = np.asarray(second.matrix.dot(first.matrix))
+
+                    for result in [self._identity] + self._gates:
+                        shift = Algebra._shift(product, np.asarray(result.matrix))
+
+                        if shift is not None:
+                            self._products[(first.code, second.code)] = (result, shift)
+
+                            if result is self._identity and first.code not in self._inverses:
+                                self._inverses[first.code] = second
+                            break
+
+    @property
+    def gates(self):
+        """
+        gates is a property
+        This is the getter method
+        """
+        return self._gates
+
+    @property
+    def identity(self):
+        """
+        identity is a property
+        This is the getter method
+        """
+        return self._identity
+
+    def product(self, first, second):
+        """
+        Composes two gates of the set: first one is applied, and then the other one.
+        E.g.: V followed by V gives Z, X followed by X gives the identity, as H followed by H does.
+
+        :param first: Gate applied first.
+        :param second: Gate applied next.
+        :return: Tuple with the resulting gate (identity included) and the power of two it is scaled
+            by, or None if the product is not a gate of the set up to a power of two.
+        """
+
+        return self._products.get((first.code, second.code))
+
+    def inverse(self, gate):
+        """
+        Finds the gate of the set that undoes another one, up to a power of two.
+
+        :param gate: Gate of the set.
+        :return: Gate instance, or None if there is none in the set.
+        """
+
+        return self._inverses.get(gate.code)
+
+    @staticmethod
+    def _shift(product, matrix):
+        """
+        Checks whether a matrix equals another one times a power of two.
+
+        :param product: Numpy array.
+        :param matrix: Numpy array of the same size.
+        :return: Exponent of that power of two, which may be negative, or None if there is none.
+        """
+
+        result = None
+
+        index = np.flatnonzero(matrix)
+
+        if len(index) > 0:
+            factor = product.flat[index[0]] / matrix.flat[index[0]]
+
+            if factor.imag == 0 and factor.real > 0 and np.array_equal(product, factor * matrix):
+                exponent = np.log2(factor.real)
+
+                if exponent == round(exponent):
+                    result = int(round(exponent))
+
+        return result
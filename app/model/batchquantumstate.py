@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from app.model.kernel import Kernel
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class BatchQuantumState:
+
+    def __init__(self, states):
+        """
+        Stacks several n-qubits of the same length, so that gates can be applied to all of them at once.
+        Each row of the underlying arrays holds the Gaussian integers of one n-qubit.
+
+        :param states: List of n-qubits.
+        """
+
+        if not isinstance(states, list) or not all(isinstance(s, QuantumState) for s in states):
+            raise TypeError('The parameter must be a list of QuantumState instances.')
+        elif len(states) == 0:
+            raise ValueError('The list of n-qubits can not be empty.')
+        elif any(s.length != states[0].length for s in states):
+            raise ValueError('All n-qubits must have the same length.')
+        else:
+            self._length = states[0].length
+
+            # Arbitrary precision is used for the whole batch as soon as one of the n-qubits needs it.
+            dtype = np.int64
+            if any(s.real.dtype == object for s in states):
+                dtype = object
+
+            self._real = np.array([s.real for s in states], dtype=dtype)
+            self._imag = np.array([s.imag for s in states], dtype=dtype)
+            self._levels = np.array([s.level for s in states], dtype=np.int64)
+
+    @property
+    def length(self):
+        """
+        length is a property
+        This is the getter method
+        """
+        return self._length
+
+    @property
+    def levels(self):
+        """
+        levels is a property
+        This is the getter method
+        """
+        return self._levels
+
+    def __len__(self):
+        """
+        Counts the n-qubits in the batch.
+
+        :return: Number of n-qubits.
+        """
+
+        return len(self._levels)
+
+    def __getitem__(self, index):
+        """
+        Extracts one of the n-qubits of the batch.
+
+        :param index: Position of the n-qubit.
+        :return: Independent copy of the n-qubit, back in 64-bit integers if the rest of the batch is
+            what needed arbitrary precision.
+        """
+
+        real, imag = Kernel.narrow(self._real[index].copy(), self._imag[index].copy())
+
+        return QuantumState.from_parts(real, imag, int(self._levels[index]))
+
+    def apply_gate(self, sequence):
+        """
+        Applies the specified operation to every n-qubit of the batch.
+
+        :param sequence : Configuration of the operation that is to be applied.
+        """
+
+        if not isinstance(sequence, Sequence):
+            raise TypeError('The parameter must be a Sequence instance.')
+        elif sequence.length != self.length:
+            raise ValueError('The length of the sequence does not match the number of qubits given.')
+        else:
+            gate = sequence.get_gate()
+
+            self.apply_operation(gate.parts, *sequence.get_operation(), gate.norm_shift)
+
+    def apply_operation(self, parts, target, control_mask, control_value, norm_shift):
+        """
+        Applies a gate that has already been broken down to every n-qubit of the batch, skipping the
+        checks made by apply_gate().
+
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the affected qubit.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have.
+        :param norm_shift: How the gate scales squared norms, as given by QuantumGate.norm_shift.
+        """
+
+        self._real, self._imag, halvings = Kernel.apply_exact(self._real, self._imag, parts, target, control_mask,
+                                                              control_value)
+
+        self._levels = Kernel.update_levels(self._levels, halvings, norm_shift, control_mask, self._compute_levels,
+                                            QuantumState.verify_level)
+
+    def _compute_levels(self):
+        """
+        Computes the normalization levels from scratch, as the binary logarithm of the squared norms.
+
+        :return: Numpy array of whole numbers.
+        """
+
+        return Kernel.floor_log2(Kernel.sum_squares(self._real, self._imag))
+
+    def copy(self):
+        """
+        Returns a full copy of the batch, allowing the original to be modified without
+        altering the copy.
+
+        :return: Copied batch.
+        """
+
+        result = BatchQuantumState([QuantumState(self.length)])
+        result._real = self._real.copy()
+        result._imag = self._imag.copy()
+        result._levels = self._levels.copy()
+        return result
+
+    def expand(self, parts, operations, norm_shift):
+        """
+        Applies a gate to every n-qubit of the batch in several ways, each one on a copy of the batch.
+        The batch itself is left as it was.
+
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param operations: List of tuples, each with the target, control mask and control value of a way
+            to apply the gate, as taken by apply_operation().
+        :param norm_shift: How the gate scales squared norms, as given by QuantumGate.norm_shift.
+        :return: New batch, with one n-qubit per n-qubit of this batch and operation, in that order: the
+            n-qubit given by the j-th operation on the i-th n-qubit is at position i * len(operations) + j.
+        """
+
+        if not isinstance(operations, list):
+            raise TypeError('The operations must be given as a list.')
+        elif len(operations) == 0:
+            raise ValueError('The list of operations can not be empty.')
+
+        copies = []
+        for target, control_mask, control_value in operations:
+            batch = self.copy()
+            batch.apply_operation(parts, target, control_mask, control_value, norm_shift)
+            copies.append(batch)
+
+        # The whole result needs arbitrary precision as soon as one of the copies does.
+        dtype = np.int64
+        if any(c._real.dtype == object for c in copies):
+            dtype = object
+
+        result = BatchQuantumState([QuantumState(self.length)])
+        result._real = np.stack([c._real.astype(dtype) for c in copies], axis=1).reshape(-1, self._real.shape[1])
+        result._imag = np.stack([c._imag.astype(dtype) for c in copies], axis=1).reshape(-1, self._imag.shape[1])
+        result._levels = np.stack([c._levels for c in copies], axis=1).reshape(-1)
+        return result
+
+    def distinct(self, rows=None):
+        """
+        Finds the first occurrence of each different n-qubit in the batch. Equal n-qubits have equal
+        coefficients and level, so 64-bit batches are compared row by row with Numpy, without building
+        any of them.
+
+        :param rows: Boolean Numpy array telling which positions are to be taken into account. All of them
+            by default.
+        :return: Numpy array with the positions of those first occurrences, in ascending order.
+        """
+
+        positions = np.arange(len(self))
+        if rows is not None:
+            positions = positions[rows]
+
+        if len(positions) == 0:
+            result = positions
+        elif self._real.dtype == object:
+            # Arbitrary precision integers can not be sorted by Numpy, so they are hashed instead.
+            found = {}
+            for i in positions.tolist():
+                found.setdefault((int(self._levels[i]), tuple(self._real[i]), tuple(self._imag[i])), i)
+            result = np.array(sorted(found.values()), dtype=np.int64)
+        else:
+            table = np.column_stack((self._levels[positions], self._real[positions], self._imag[positions]))
+            first = np.unique(table, axis=0, return_index=True)[1]
+            result = positions[np.sort(first)]
+
+        return result
+
+    def to_list(self):
+        """
+        Extracts all n-qubits of the batch.
+
+        :return: List of independent n-qubits.
+        """
+
+        return [self[i] for i in range(len(self))]
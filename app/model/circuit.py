@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from app.model.batchquantumstate import BatchQuantumState
+from app.model.optimizer import Optimizer
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class Circuit:
+
+    def __init__(self, sequences, optimize=False):
+        """
+        Compiles a list of sequences once, so that it can be applied to any number of n-qubits without
+        reading the sequences again. Each step keeps the kernel parts of its gate, the bit position of
+        its target, its controls as bit masks and how it scales squared norms.
+
+        :param sequences: List of sequences, in the order they are to be applied.
+        :param optimize: Whether to fuse and cancel operations first, through Optimizer.optimize().
+            Results stay the same for n-qubits whose coefficients are already simplified, which is
+            always the case unless they were built from arbitrary parts.
+        """
+
+        if not isinstance(sequences, list) or not all(isinstance(s, Sequence) for s in sequences):
+            raise TypeError('The first parameter must be a list of Sequence instances.')
+        elif len(sequences) == 0:
+            raise ValueError('The list of sequences can not be empty.')
+        elif any(s.length != sequences[0].length for s in sequences):
+            raise ValueError('All sequences must have the same length.')
+        elif not isinstance(optimize, bool):
+            raise TypeError('The second parameter must be a boolean.')
+        else:
+            self._length = sequences[0].length
+
+            if optimize:
+                sequences = Optimizer.optimize(sequences)
+
+            self._steps = tuple(Circuit._compile(s) for s in sequences)
+
+    @property
+    def length(self):
+        """
+        length is a property
+        This is the getter method
+        """
+        return self._length
+
+    @property
+    def steps(self):
+        """
+        steps is a property
+        This is the getter method
+        Tuple of compiled steps, as taken by QuantumState.apply_operation().
+        """
+        return self._steps
+
+    def __len__(self):
+        """
+        Counts the steps of the circuit, once compiled.
+
+        :return: Number of steps.
+        """
+
+        return len(self._steps)
+
+    def run(self, nqubit, times=1):
+        """
+        Applies every step of the circuit, in place, to a n-qubit or to a batch of them.
+
+        :param nqubit: QuantumState or BatchQuantumState instance.
+        :param times: Number of times that the whole circuit is to be applied.
+        """
+
+        if not isinstance(nqubit, (QuantumState, BatchQuantumState)):
+            raise TypeError('The first parameter must be a QuantumState or BatchQuantumState instance.')
+        elif nqubit.length != self.length:
+            raise ValueError('The length of the circuit does not match the number of qubits given.')
+        elif not isinstance(times, int):
+            raise TypeError('The number of times must be a whole number.')
+        elif times < 0:
+            raise ValueError('The number of times can not be negative.')
+        else:
+            for i in range(times):
+                for step in self._steps:
+                    nqubit.apply_operation(*step)
+
+    @staticmethod
+    def _compile(sequence):
+        """
+        Breaks a sequence down into the arguments taken by QuantumState.apply_operation().
+
+        :param sequence: Sequence instance.
+        :return: Tuple with the parts, target, control mask, control value and norm shift of the step.
+        """
+
+        gate = sequence.get_gate()
+        target, control_mask, control_value = sequence.get_operation()
+
+        return gate.parts, target, control_mask, control_value, gate.norm_shift
@@ -0,0 +1,744 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class Kernel:
+    """
+    Vectorized routines that apply gates to an amplitude vector, working on every affected pair of
+    quantum states (or group of them, for gates on several qubits) at once instead of one at a time.
+    Amplitudes are Gaussian integers, kept as two integer arrays with their real and imaginary parts.
+
+    All routines accept arrays with any number of leading axes, so that several vectors can be
+    processed at once: the last axis always holds the amplitudes of one vector.
+
+    The chunked routines split a single vector into independent blocks instead, which may be given to
+    a pool of threads: NumPy releases the GIL while working on 64-bit integers.
+    """
+
+    # Magnitude from which amplitudes are stored as arbitrary precision integers.
+    INT64_LIMIT = pow(2, 62)
+
+    # Magnitude up to which whole numbers are represented exactly as floating point numbers.
+    FLOAT64_LIMIT = pow(2, 53)
+
+    # Longest axis whose control mask is kept for later gates. Longer ones are computed every time.
+    CACHED_AXIS_LENGTH = pow(2, 12)
+
+    # Powers of i, as (real, imaginary) pairs, so that their position gives the number of quarter turns.
+    _TURNS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+    @staticmethod
+    def apply(real, imag, parts, target, control_mask=0, control_value=0):
+        """
+        Applies a 2^k x 2^k matrix, in place, to the k consecutive qubits starting at the given bit
+        position. The amplitude vector is reshaped so that all the states of every group affected
+        together lie on their own axis, which lets a single NumPy operation update all of them.
+
+        :param real: Contiguous Numpy array, whose last axis holds the real parts of the 2^n amplitudes.
+        :param imag: Contiguous Numpy array, whose last axis holds the imaginary parts.
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the least significant affected qubit (0 being the least
+            significant one of the vector).
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have for the gate to be applied.
+        """
+
+        if not real.flags.c_contiguous or not imag.flags.c_contiguous:
+            raise ValueError('The kernels work in place, so the arrays must be contiguous.')
+
+        size = real.shape[-1]
+        bit = 1 << target
+        states = len(parts)
+
+        if control_mask | ((states - 1) << target) == size - 1:
+            # Every other qubit is a control, so a single group of states is affected.
+            first = control_value & ~((states - 1) << target)
+            members = [first | (j << target) for j in range(states)]
+            group = tuple((real[..., state].copy(), imag[..., state].copy()) for state in members)
+
+            for state, new in zip(members, Kernel._products(parts, group)):
+                if new is not None:
+                    real[..., state], imag[..., state] = new
+        else:
+            shape = real.shape[:-1] + (size // (states * bit), states, bit)
+            real_view = real.reshape(shape)
+            imag_view = imag.reshape(shape)
+
+            if control_mask == 0:
+                group = tuple((real_view[..., j, :], imag_view[..., j, :]) for j in range(states))
+
+                for state, new in enumerate(list(Kernel._products(parts, group))):
+                    if new is not None:
+                        real_view[..., state, :], imag_view[..., state, :] = new
+            else:
+                mask = Kernel.control_mask(size, target, control_mask, control_value, states)
+                views = [(real_view[..., j, :], imag_view[..., j, :]) for j in range(states)]
+                group = tuple((real_state[..., mask], imag_state[..., mask])
+                              for real_state, imag_state in views)
+
+                for (real_state, imag_state), new in zip(views, Kernel._products(parts, group)):
+                    if new is not None:
+                        real_state[..., mask], imag_state[..., mask] = new
+
+    @staticmethod
+    def apply_exact(real, imag, parts, target, control_mask=0, control_value=0):
+        """
+        Applies a 2^k x 2^k matrix as Kernel.apply() does, keeping the amplitudes exact and as small as
+        possible: they are switched to arbitrary precision if the gate could overflow 64-bit integers,
+        every vector is then divided by the largest power of two it shares, and they go back to 64-bit
+        integers as soon as every one of them fits again.
+
+        :param real: Contiguous Numpy array, whose last axis holds the real parts of the 2^n amplitudes.
+        :param imag: Contiguous Numpy array with the imaginary parts, of the same shape.
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the least significant affected qubit.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have for the gate to be applied.
+        :return: Tuple with the real parts, the imaginary parts (both arrays may be new ones) and the
+            number of times that each vector was divided by two, as given by Kernel.simplify().
+        """
+
+        real, imag = Kernel.widen(real, imag, Kernel.growth(parts))
+        Kernel.apply(real, imag, parts, target, control_mask, control_value)
+        halvings = Kernel.simplify(real, imag)
+        real, imag = Kernel.narrow(real, imag)
+
+        return real, imag, halvings
+
+    @staticmethod
+    def update_levels(levels, halvings, norm_shift, control_mask, compute, verify=False):
+        """
+        Updates normalization levels once a gate has been applied and the vectors simplified. Each
+        halving divides the squared norm by four, and gates that scale norms uniformly shift it by their
+        norm shift, unless they are controlled: then only some amplitudes are scaled, and levels must
+        be computed from scratch.
+
+        :param levels: Levels before the gate, as a whole number or a Numpy array of them.
+        :param halvings: Number of times that each vector was divided by two, as given by
+            Kernel.simplify().
+        :param norm_shift: How the gate scales squared norms, as given by QuantumGate.norm_shift.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param compute: Function without parameters that computes the levels from scratch.
+        :param verify: Whether to check the updated levels against those computed from scratch.
+        :return: New levels, of the same type as the given ones.
+        """
+
+        if norm_shift is None or (norm_shift != 0 and control_mask != 0):
+            result = compute()
+        else:
+            result = levels + norm_shift - 2 * halvings
+
+            if verify and not np.array_equal(result, compute()):
+                raise RuntimeError('The normalization levels do not match the amplitudes.')
+
+        return result
+
+    @staticmethod
+    def apply_sparse(indices, real, imag, parts, target, control_mask=0, control_value=0):
+        """
+        Applies a 2^k x 2^k matrix to a vector stored in sparse form, where only the states with a
+        non-null amplitude are kept. Only the groups that hold at least one of those states are computed.
+
+        :param indices: Sorted Numpy array with the states that have a non-null amplitude.
+        :param real: Numpy array with the real parts of those amplitudes.
+        :param imag: Numpy array with the imaginary parts of those amplitudes.
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the least significant affected qubit.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have for the gate to be applied.
+        :return: Tuple with the new indices, real parts and imaginary parts, in sparse form.
+        """
+
+        bits = (len(parts) - 1) << target
+        mask = control_mask & ~bits
+
+        affected = (indices & mask) == (control_value & mask)
+        first = np.unique(indices[affected] & ~bits)
+        members = [first | (j << target) for j in range(len(parts))]
+
+        # Gather all amplitudes of every affected group, null ones being absent from the vector.
+        group = []
+        for states in members:
+            position = np.minimum(np.searchsorted(indices, states), len(indices) - 1)
+            found = indices[position] == states
+            group.append((np.where(found, real[position], 0).astype(real.dtype),
+                         np.where(found, imag[position], 0).astype(imag.dtype)))
+
+        new = [group[state] if n is None else n for state, n in enumerate(Kernel._products(parts, group))]
+
+        indices = np.concatenate([indices[~affected]] + members)
+        real = np.concatenate([real[~affected]] + [np.broadcast_to(n[0], first.shape) for n in new])\
+            .astype(real.dtype)
+        imag = np.concatenate([imag[~affected]] + [np.broadcast_to(n[1], first.shape) for n in new])\
+            .astype(imag.dtype)
+
+        # Keep the sparse form canonical: sorted states, no null amplitudes.
+        kept = (real != 0) | (imag != 0)
+        order = np.argsort(indices[kept], kind='stable')
+
+        return indices[kept][order], real[kept][order], imag[kept][order]
+
+    @staticmethod
+    def apply_chunked(real, imag, parts, target, control_mask=0, control_value=0, chunk=pow(2, 20), pool=None):
+        """
+        Applies a 2^k x 2^k matrix, in place, to the qubits starting at the given bit position, one block
+        of groups at a time. Only the block being computed is loaded into memory, so the vector may be a
+        memory-mapped file far larger than the available RAM.
+
+        :param real: One-dimensional Numpy array with the real parts of the 2^n amplitudes.
+        :param imag: One-dimensional Numpy array with the imaginary parts.
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the least significant affected qubit.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have for the gate to be applied.
+        :param chunk: Maximum number of groups of states in each block.
+        :param pool: Pool of threads among which the blocks are shared. None to compute them one by one.
+        """
+
+        if control_mask | ((len(parts) - 1) << target) == real.shape[-1] - 1:
+            # A single group of states is affected, so there is nothing to split.
+            Kernel.apply(real, imag, parts, target, control_mask, control_value)
+        else:
+            # Blocks never share a group of states, so they can be computed at the same time.
+            Kernel._run(pool, lambda block: Kernel.apply_block(real, imag, parts, target, control_mask,
+                                                               control_value, block),
+                        Kernel.blocks(real.shape[-1], target, chunk, len(parts)))
+
+    @staticmethod
+    def blocks(size, target, chunk, states=2):
+        """
+        Splits the groups of states affected by some qubits into blocks that can be computed
+        independently. Blocks are given over the layout used by Kernel.apply(): one row per combination
+        of the qubits above the targets, one column per combination of the qubits below them. All the
+        states of a group always fall within the same block, however far apart the targets place them.
+
+        :param size: Number of amplitudes in the vector (2^n).
+        :param target: Bit position of the least significant affected qubit.
+        :param chunk: Maximum number of groups of states in each block.
+        :param states: Number of states in each group, 2^k for k affected qubits.
+        :return: Generator of (rows, columns) tuples of slices.
+        """
+
+        bit = 1 << target
+        high = size // (states * bit)
+        rows = max(1, chunk // bit)
+        columns = min(bit, chunk)
+
+        for row in range(0, high, rows):
+            for column in range(0, bit, columns):
+                yield slice(row, min(row + rows, high)), slice(column, min(column + columns, bit))
+
+    @staticmethod
+    def apply_block(real, imag, parts, target, control_mask, control_value, block):
+        """
+        Applies a 2^k x 2^k matrix, in place, to a single block of groups given by Kernel.blocks().
+
+        :param real: One-dimensional Numpy array with the real parts of the 2^n amplitudes.
+        :param imag: One-dimensional Numpy array with the imaginary parts.
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the affected qubit (0 being the least significant one).
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have for the gate to be applied.
+        :param block: Tuple of slices, the rows and columns of the groups to be computed.
+        """
+
+        rows, columns = block
+        bit = 1 << target
+        states = len(parts)
+        shape = (real.shape[-1] // (states * bit), states, bit)
+
+        views = [(real.reshape(shape)[rows, j, columns], imag.reshape(shape)[rows, j, columns])
+                 for j in range(states)]
+
+        if control_mask == 0:
+            group = tuple(views)
+
+            for (real_state, imag_state), new in zip(views, list(Kernel._products(parts, group))):
+                if new is not None:
+                    real_state[...], imag_state[...] = new
+        else:
+            # The controls are only checked on the states of the block, never on the whole vector.
+            row_mask, column_mask = Kernel.axis_masks(rows, columns, target, control_mask, control_value, states)
+            mask = row_mask[:, np.newaxis] & column_mask
+
+            if np.any(mask):
+                group = tuple((real_state[mask], imag_state[mask]) for real_state, imag_state in views)
+
+                for (real_state, imag_state), new in zip(views, Kernel._products(parts, group)):
+                    if new is not None:
+                        real_state[mask], imag_state[mask] = new
+
+    @staticmethod
+    def ranges(size, chunk):
+        """
+        Splits a vector into consecutive ranges of amplitudes, to be reduced one at a time.
+
+        :param size: Number of amplitudes in the vector.
+        :param chunk: Maximum number of amplitudes in each range.
+        :return: Generator of slices.
+        """
+
+        for start in range(0, size, chunk):
+            yield slice(start, min(start + chunk, size))
+
+    @staticmethod
+    def simplify_chunked(real, imag, chunk=pow(2, 20), pool=None):
+        """
+        Divides a one-dimensional vector, in place, by the largest power of two shared by all of its
+        coefficients, as Kernel.simplify() does, but loading one range of amplitudes at a time.
+
+        :param real: One-dimensional Numpy array with the real parts.
+        :param imag: One-dimensional Numpy array with the imaginary parts.
+        :param chunk: Maximum number of amplitudes loaded at once.
+        :param pool: Pool of threads among which the ranges are shared. None to reduce them one by one.
+        :return: Number of times that the vector was divided by two.
+        """
+
+        def reduce(part):
+            return int(np.bitwise_or.reduce(real[part] | imag[part]))
+
+        def shift(part):
+            real[part] >>= result
+            imag[part] >>= result
+
+        combined = 0
+        for value in Kernel._run(pool, reduce, Kernel.ranges(real.shape[-1], chunk)):
+            combined |= value
+
+        result = 0
+        if combined != 0:
+            result = Kernel.floor_log2(combined & -combined)
+
+        if result != 0:
+            Kernel._run(pool, shift, Kernel.ranges(real.shape[-1], chunk))
+
+        return result
+
+    @staticmethod
+    def peak_chunked(real, imag, chunk=pow(2, 20), pool=None):
+        """
+        Finds the largest magnitude among the parts of a one-dimensional vector, as Kernel.peak() does,
+        but loading one range of amplitudes at a time.
+
+        :param real: One-dimensional Numpy array with the real parts.
+        :param imag: One-dimensional Numpy array with the imaginary parts.
+        :param chunk: Maximum number of amplitudes loaded at once.
+        :param pool: Pool of threads among which the ranges are shared. None to reduce them one by one.
+        :return: Whole number.
+        """
+
+        return max(Kernel._run(pool, lambda part: Kernel.peak(real[part], imag[part]),
+                               Kernel.ranges(real.shape[-1], chunk)))
+
+    @staticmethod
+    def sum_squares_chunked(real, imag, chunk=pow(2, 20), pool=None):
+        """
+        Computes the squared norm of a one-dimensional vector, as Kernel.sum_squares() does, but
+        loading one range of amplitudes at a time.
+
+        :param real: One-dimensional Numpy array with the real parts.
+        :param imag: One-dimensional Numpy array with the imaginary parts.
+        :param chunk: Maximum number of amplitudes loaded at once.
+        :param pool: Pool of threads among which the ranges are shared. None to reduce them one by one.
+        :return: Whole number.
+        """
+
+        return sum(Kernel._run(pool, lambda part: Kernel.sum_squares(real[part], imag[part]),
+                               Kernel.ranges(real.shape[-1], chunk)))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def pool(threads):
+        """
+        Gives a pool with the given number of threads, shared by every caller asking for that size.
+        It is created the first time it is needed.
+
+        :param threads: Number of threads.
+        :return: ThreadPoolExecutor instance.
+        """
+
+        return ThreadPoolExecutor(threads)
+
+    @staticmethod
+    def dot(a_real, a_imag, b_real, b_imag):
+        """
+        Computes the matrix product of two arrays of Gaussian integers, exactly. Floating point products
+        are used while every partial sum is small enough to be represented without rounding, then
+        64-bit integers, and arbitrary precision integers beyond that.
+
+        :param a_real: Numpy array with the real parts of the first factor.
+        :param a_imag: Numpy array with the imaginary parts of the first factor.
+        :param b_real: Numpy array with the real parts of the second factor.
+        :param b_imag: Numpy array with the imaginary parts of the second factor.
+        :return: Tuple with the real and imaginary parts of the product.
+        """
+
+        bound = 2 * a_real.shape[-1] * Kernel.peak(a_real, a_imag) * Kernel.peak(b_real, b_imag)
+
+        if a_real.dtype == object or b_real.dtype == object or bound >= Kernel.INT64_LIMIT:
+            dtype = object
+        elif bound < Kernel.FLOAT64_LIMIT:
+            dtype = np.float64
+        else:
+            dtype = np.int64
+
+        a_real, a_imag, b_real, b_imag = [x.astype(dtype) for x in (a_real, a_imag, b_real, b_imag)]
+
+        real = np.dot(a_real, b_real) - np.dot(a_imag, b_imag)
+        imag = np.dot(a_real, b_imag) + np.dot(a_imag, b_real)
+
+        if dtype == np.float64:
+            real = np.rint(real).astype(np.int64)
+            imag = np.rint(imag).astype(np.int64)
+
+        return Kernel.narrow(real, imag)
+
+    @staticmethod
+    def split(matrix):
+        """
+        Splits a matrix of Gaussian integers into the integer parts used by the kernels.
+
+        :param matrix: Numpy matrix with complex entries.
+        :return: Tuple of rows, each one a tuple of (real, imaginary) pairs of whole numbers.
+        """
+
+        matrix = np.asarray(matrix)
+
+        if not np.array_equal(matrix, np.round(matrix)):
+            raise ValueError('The matrix must be made of Gaussian integers.')
+
+        return tuple(tuple((int(round(c.real)), int(round(c.imag))) for c in row) for row in matrix)
+
+    @staticmethod
+    def growth(parts):
+        """
+        Bounds how much a gate may increase the magnitude of the integer parts of an amplitude.
+
+        :param parts: Gate, as returned by Kernel.split().
+        :return: Whole number, the factor that bounds the growth.
+        """
+
+        return max(sum(abs(c[0]) + abs(c[1]) for c in row) for row in parts)
+
+    @staticmethod
+    def widen(real, imag, growth):
+        """
+        Switches the parts of the amplitudes to arbitrary precision integers if growing them by the
+        given factor could overflow 64-bit integers.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :param growth: Factor by which the magnitudes may grow, as returned by Kernel.growth().
+        :return: Tuple with the real and imaginary parts, converted if needed.
+        """
+
+        if growth > 1 and real.dtype != object and Kernel.peak(real, imag) * growth >= Kernel.INT64_LIMIT:
+            real = real.astype(object)
+            imag = imag.astype(object)
+
+        return real, imag
+
+    @staticmethod
+    def narrow(real, imag):
+        """
+        Switches the parts of the amplitudes back to 64-bit integers as soon as every one of them fits.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :return: Tuple with the real and imaginary parts, converted if possible.
+        """
+
+        if real.dtype == object and Kernel.peak(real, imag) < Kernel.INT64_LIMIT:
+            real = real.astype(np.int64)
+            imag = imag.astype(np.int64)
+
+        return real, imag
+
+    @staticmethod
+    def peak(real, imag):
+        """
+        Finds the largest magnitude among the real and imaginary parts of the amplitudes.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :return: Whole number.
+        """
+
+        return int(max(np.abs(real).max(), np.abs(imag).max()))
+
+    @staticmethod
+    def simplify(real, imag):
+        """
+        Divides every vector, in place, by the largest power of two shared by all of its coefficients.
+        That power is found in a single pass, as the trailing zeros of the bitwise OR of all real and
+        imaginary parts: the lowest bit set in any of them.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :return: Number of times that each vector was divided by two.
+        """
+
+        combined = np.asarray(np.bitwise_or.reduce(real | imag, axis=-1))
+        shifts = np.where(combined != 0, Kernel.floor_log2(combined & -combined), 0).astype(np.int64)
+
+        if np.any(shifts):
+            amounts = shifts[..., np.newaxis].astype(real.dtype)
+            real >>= amounts
+            imag >>= amounts
+
+        return shifts
+
+    @staticmethod
+    def sum_squares(real, imag):
+        """
+        Computes the squared norm of every vector, falling back to arbitrary precision whenever 64-bit
+        integers could overflow.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :return: Squared norms, as a whole number or a Numpy array of them.
+        """
+
+        if real.dtype != object and pow(Kernel.peak(real, imag), 2) * real.shape[-1] >= Kernel.INT64_LIMIT:
+            real = real.astype(object)
+            imag = imag.astype(object)
+
+        result = np.sum(real * real, axis=-1) + np.sum(imag * imag, axis=-1)
+
+        if real.ndim == 1:
+            result = int(result)
+
+        return result
+
+    @staticmethod
+    def floor_log2(values):
+        """
+        Computes the integer part of the binary logarithm of positive whole numbers, exactly.
+
+        :param values: Whole number or Numpy array of them.
+        :return: Whole number or Numpy array of them.
+        """
+
+        if not isinstance(values, np.ndarray) or values.ndim == 0:
+            result = int(values).bit_length() - 1
+        elif values.dtype == object:
+            result = np.array([int(v).bit_length() - 1 for v in values.ravel()],
+                              dtype=np.int64).reshape(values.shape)
+        else:
+            result = np.frexp(values.astype(np.float64))[1].astype(np.int64) - 1
+
+            # Floats may round up to the next power of two, so the estimation is corrected.
+            result -= np.left_shift(1, result) > values
+
+        return result
+
+    @staticmethod
+    def control_mask(size, target, control_mask, control_value, states=2):
+        """
+        Computes which groups of states satisfy the controls, laid out as the reshaped vector used by
+        the kernels: one row per combination of the qubits above the targets, one column per
+        combination of the qubits below them. Rows and columns hold different qubits, so the mask is
+        the outer product of one mask per axis, and only those are kept for later gates.
+
+        :param size: Number of amplitudes in the vector (2^n).
+        :param target: Bit position of the least significant affected qubit.
+        :param control_mask: Bits that act as controls.
+        :param control_value: Value those control bits must have.
+        :param states: Number of states in each group, 2^k for k affected qubits.
+        :return: Read-only boolean Numpy array.
+        """
+
+        bit = 1 << target
+        rows, columns = Kernel.axis_masks(slice(0, size // (states * bit)), slice(0, bit), target, control_mask,
+                                          control_value, states)
+
+        result = rows[:, np.newaxis] & columns
+        result.setflags(write=False)
+
+        return result
+
+    @staticmethod
+    def axis_masks(rows, columns, target, control_mask, control_value, states=2):
+        """
+        Computes which rows and which columns of the layout used by the kernels satisfy the controls on
+        their own qubits. A group satisfies all of them if both its row and its column do.
+
+        :param rows: Slice of the rows to be checked.
+        :param columns: Slice of the columns to be checked.
+        :param target: Bit position of the least significant affected qubit.
+        :param control_mask: Bits that act as controls.
+        :param control_value: Value those control bits must have.
+        :param states: Number of states in each group, 2^k for k affected qubits.
+        :return: Tuple with both read-only boolean Numpy arrays.
+        """
+
+        step = states << target
+        high = control_mask & -step
+        low = control_mask & ((1 << target) - 1)
+
+        return (Kernel._axis_mask(rows.start, rows.stop, step, high, control_value & high),
+                Kernel._axis_mask(columns.start, columns.stop, 1, low, control_value & low))
+
+    @staticmethod
+    def _axis_mask(start, stop, step, control_mask, control_value):
+        """
+        Computes which positions along one axis satisfy the controls, caching short axes.
+
+        :param start: First position.
+        :param stop: Position after the last one.
+        :param step: Distance between the states of consecutive positions.
+        :param control_mask: Control bits that lie on this axis.
+        :param control_value: Value those control bits must have.
+        :return: Read-only boolean Numpy array.
+        """
+
+        if stop - start <= Kernel.CACHED_AXIS_LENGTH:
+            result = Kernel._cached_axis_mask(start, stop, step, control_mask, control_value)
+        else:
+            result = Kernel._compute_axis_mask(start, stop, step, control_mask, control_value)
+
+        return result
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _cached_axis_mask(start, stop, step, control_mask, control_value):
+        """
+        Caches Kernel._compute_axis_mask(), which takes the same parameters, for short axes.
+        """
+
+        return Kernel._compute_axis_mask(start, stop, step, control_mask, control_value)
+
+    @staticmethod
+    def _compute_axis_mask(start, stop, step, control_mask, control_value):
+        """
+        Computes which positions along one axis satisfy the controls, as Kernel._axis_mask() does.
+        """
+
+        result = (np.arange(start, stop) * step & control_mask) == control_value
+        result.setflags(write=False)
+
+        return result
+
+    @staticmethod
+    def _run(pool, function, items):
+        """
+        Calls a function on every item, either one after another or on a pool of threads.
+
+        :param pool: Pool of threads, or None.
+        :param function: Function to be called.
+        :param items: Iterable of parameters for the function.
+        :return: List of results, in the same order as the items.
+        """
+
+        if pool is None:
+            result = [function(i) for i in items]
+        else:
+            result = list(pool.map(function, items))
+
+        return result
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def monomial(parts):
+        """
+        Describes a gate with a single non-null coefficient per row and column, each of them a power of
+        i (1, i, -1 or -i). Such gates only move and rotate amplitudes, so no product is needed.
+        Only the gates applied last are cached, so that those made on the fly (e.g. fused by Optimizer)
+        are not kept forever.
+
+        :param parts: Gate, as returned by Kernel.split().
+        :return: Tuple with the state each row takes its amplitude from, and the number of quarter
+            turns it is rotated by, for every row. None if the gate is not of that kind.
+        """
+
+        result = []
+
+        for row in parts:
+            sources = [i for i in range(len(row)) if row[i] != (0, 0)]
+
+            if len(sources) != 1 or row[sources[0]] not in Kernel._TURNS:
+                return None
+
+            result.append((sources[0], Kernel._TURNS.index(row[sources[0]])))
+
+        if len(set(source for source, turns in result)) != len(result):
+            return None
+
+        return tuple(result)
+
+    @staticmethod
+    def _products(parts, group):
+        """
+        Computes the new amplitudes of a group of states (a pair, for gates on a single qubit), one state
+        at a time. Gates described by Kernel.monomial() are applied by swapping and negating parts, and
+        states they leave as they were are skipped. New amplitudes never share memory with the group,
+        but they are only computed as they are requested: if the group is a view of the vector, all of
+        them must be computed before any is written back.
+
+        :param parts: Gate, as returned by Kernel.split().
+        :param group: Amplitudes of the group, each one as a (real, imaginary) pair of arrays.
+        :return: Generator with the new amplitude of each state, None for those that do not change.
+        """
+
+        monomial = Kernel.monomial(parts)
+
+        if monomial is None:
+            for row in parts:
+                yield Kernel._multiply(row, group)
+        else:
+            for state, (source, turns) in enumerate(monomial):
+                if source == state and turns == 0:
+                    yield None
+                else:
+                    yield Kernel._turn(group[source], turns)
+
+    @staticmethod
+    def _turn(amplitude, turns):
+        """
+        Multiplies an amplitude by a power of i, into new arrays.
+
+        :param amplitude: Pair of arrays, with the real and imaginary parts.
+        :param turns: Number of quarter turns, from 0 to 3.
+        :return: Tuple with the real and imaginary parts of the result.
+        """
+
+        real, imag = amplitude
+
+        if turns == 0:
+            result = np.array(real), np.array(imag)
+        elif turns == 1:
+            result = np.negative(imag), np.array(real)
+        elif turns == 2:
+            result = np.negative(real), np.negative(imag)
+        else:
+            result = np.array(imag), np.negative(real)
+
+        return result
+
+    @staticmethod
+    def _multiply(row, group):
+        """
+        Computes one row of the matrix product, row[0] * group[0] + row[1] * group[1] + ..., over
+        Gaussian integers. Null coefficients are skipped, so that sparse gates cost less.
+
+        :param row: Row of the gate, as a tuple of (real, imaginary) coefficients.
+        :param group: Amplitudes of the group, each one as a (real, imaginary) pair of arrays.
+        :return: Tuple with the real and imaginary parts of the result.
+        """
+
+        real = 0
+        imag = 0
+
+        for (c_real, c_imag), (a_real, a_imag) in zip(row, group):
+            if c_real != 0:
+                real = real + c_real * a_real
+                imag = imag + c_real * a_imag
+            if c_imag != 0:
+                real = real - c_imag * a_imag
+                imag = imag + c_imag * a_real
+
+        return real, imag
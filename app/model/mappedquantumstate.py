@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import tempfile
+import numpy as np
+
+from app.model.kernel import Kernel
+from app.model.quantumstate import QuantumState
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class MappedQuantumState(QuantumState):
+
+    # Number of amplitudes loaded at once, unless stated otherwise. Bounds the resident memory.
+    CHUNK = pow(2, 20)
+
+    def __init__(self, length, state=0, filename=None, chunk=None):
+        """
+        Creates a n-qubit whose amplitudes are kept in a memory-mapped file instead of in RAM, so that
+        its size is only limited by the disk. Gates are applied one block of amplitudes at a time.
+        Amplitudes must fit in 64-bit integers, as arbitrary precision can not be mapped to a file.
+
+        :param length: Number of qubits that the n-qubit vector has.
+        :param state: Initial classic state for the qubit to start in.
+        :param filename: File where the amplitudes are to be stored, overwritten if it already exists.
+            By default, a temporary file is used, which is deleted along with the n-qubit.
+        :param chunk: Maximum number of amplitudes loaded at once. CHUNK by default.
+        """
+
+        QuantumState.__init__(self, length, state, sparse=True)  # May raise an exception.
+
+        if chunk is None:
+            chunk = MappedQuantumState.CHUNK
+
+        if not isinstance(chunk, int):
+            raise TypeError('The chunk size must be a whole number.')
+        elif chunk <= 0:
+            raise ValueError('The chunk size must be positive.')
+        else:
+            self._chunk = chunk
+            self._filename = filename
+
+            # Real parts on the first row of the file, imaginary parts on the second one.
+            if filename is None:
+                self._map = np.memmap(tempfile.TemporaryFile(), dtype=np.int64, mode='w+',
+                                      shape=(2, pow(2, length)))
+            else:
+                self._map = np.memmap(filename, dtype=np.int64, mode='w+', shape=(2, pow(2, length)))
+
+            self._indices = None
+            self._real = self._map[0]
+            self._imag = self._map[1]
+
+            self._real[state] = 1
+
+            # Bound on the magnitude of the parts, so that the file is only scanned when it could overflow.
+            self._bound = 1
+
+    @QuantumState.vector.setter
+    def vector(self, vector):
+        """
+        This is the setter method
+        The amplitudes are written to the file, so the length of the n-qubit can not change.
+        """
+        if not isinstance(vector, np.ndarray):
+            raise TypeError("The n-qubit vector must be a Numpy array or matrix.")
+        else:
+            vector = np.asarray(vector).ravel()
+
+            if not np.array_equal(vector, np.round(vector)):
+                raise ValueError("The n-qubit vector must be made of Gaussian integers.")
+            elif vector.size != pow(2, self.length):
+                raise ValueError("The length of a memory-mapped n-qubit can not change.")
+            elif max(np.abs(vector.real).max(), np.abs(vector.imag).max()) >= Kernel.INT64_LIMIT:
+                raise OverflowError("The amplitudes of a memory-mapped n-qubit must fit in 64-bit integers.")
+            else:
+                self._real[...] = np.round(vector.real)
+                self._imag[...] = np.round(vector.imag)
+                self._bound = Kernel.peak_chunked(self._real, self._imag, self._chunk)
+                self._level = self._compute_level()
+
+    @property
+    def filename(self):
+        """
+        filename is a property
+        This is the getter method
+        """
+        return self._filename
+
+    @property
+    def chunk(self):
+        """
+        chunk is a property
+        This is the getter method
+        """
+        return self._chunk
+
+    def flush(self):
+        """
+        Writes any pending change of the amplitudes to the file.
+        """
+
+        self._map.flush()
+
+    def copy(self):
+        """
+        Returns a full copy of the n-qubit, stored in a new temporary file.
+
+        :return: Copied n-qubit.
+        """
+
+        result = MappedQuantumState(self.length, chunk=self._chunk)
+
+        for part in Kernel.ranges(pow(2, self.length), self._chunk):
+            result._real[part] = self._real[part]
+            result._imag[part] = self._imag[part]
+
+        result._bound = self._bound
+        result.level = self.level
+        return result
+
+    def _apply(self, parts, target, control_mask, control_value):
+        """
+        Applies a gate to the mapped amplitudes, one block at a time.
+
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the affected qubit.
+        :param control_mask: Bits that act as controls.
+        :param control_value: Value those control bits must have.
+        """
+
+        growth = Kernel.growth(parts)
+
+        if self._bound * growth >= Kernel.INT64_LIMIT:
+            self._bound = Kernel.peak_chunked(self._real, self._imag, self._chunk)
+
+            if self._bound * growth >= Kernel.INT64_LIMIT:
+                raise OverflowError('The amplitudes of a memory-mapped n-qubit must fit in 64-bit integers.')
+
+        Kernel.apply_chunked(self._real, self._imag, parts, target, control_mask, control_value,
+                             max(1, self._chunk // 2), self._pool(self._real)[0])
+        self._bound *= growth
+
+    def _simplify(self):
+        """
+        Tries to divide the whole vector by two, one range of amplitudes at a time.
+
+        :return: Number of times that the vector was divided by two.
+        """
+
+        result = Kernel.simplify_chunked(self._real, self._imag, self._chunk, self._pool(self._real)[0])
+        self._bound >>= result
+        return result
+
+    def _narrow(self):
+        """
+        Mapped amplitudes are always 64-bit integers, so there is nothing to do.
+        """
+        pass
+
+    def _compute_level(self):
+        """
+        Computes the normalization level from scratch, one range of amplitudes at a time.
+
+        :return: Whole number.
+        """
+
+        return Kernel.floor_log2(Kernel.sum_squares_chunked(self._real, self._imag, self._chunk,
+                                                            self._pool(self._real)[0]))
+
+    def _pool(self, array):
+        """
+        Shares the blocks among QuantumState.threads threads, whichever the length of the n-qubit.
+
+        :param array: Numpy array with the parts of the amplitudes.
+        :return: Tuple with the pool of threads (None for a single thread) and the amplitudes per block.
+        """
+
+        pool = None
+        if QuantumState.threads > 1:
+            pool = Kernel.pool(QuantumState.threads)
+
+        return pool, self._chunk
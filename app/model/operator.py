@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+import numpy as np
+
+from app.model.circuit import Circuit
+from app.model.kernel import Kernel
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class Operator:
+
+    def __init__(self, real, imag):
+        """
+        Holds the full 2^n x 2^n matrix of a circuit, as Gaussian integers, so that it can be applied
+        with a single product instead of gate by gate. Worth it for small n-qubits only.
+
+        As n-qubits are simplified after every gate, dividing the vector by powers of two in between
+        makes no difference: the matrix is kept divided by the largest power of two shared by all of its
+        entries, and n-qubits are simplified, and their level computed, once the product is done.
+
+        :param real: Square Numpy array with the real parts, of size 2^n.
+        :param imag: Square Numpy array with the imaginary parts, of size 2^n.
+        """
+
+        if not isinstance(real, np.ndarray) or not isinstance(imag, np.ndarray):
+            raise TypeError('The parts of the operator must be Numpy arrays.')
+        elif real.ndim != 2 or real.shape[0] != real.shape[1] or real.shape != imag.shape \
+                or real.shape[0] & (real.shape[0] - 1) != 0 or real.shape[0] == 1:
+            raise ValueError('Both parts must be square matrices of the same size, a natural power of two.')
+        else:
+            self._length = real.shape[0].bit_length() - 1
+
+            self._real = np.array(real, order='C')
+            self._imag = np.array(imag, order='C')
+            Kernel.simplify(self._real.reshape(-1), self._imag.reshape(-1))
+            self._real, self._imag = Kernel.narrow(self._real, self._imag)
+
+            self._real.setflags(write=False)
+            self._imag.setflags(write=False)
+
+    @property
+    def length(self):
+        """
+        length is a property
+        This is the getter method
+        """
+        return self._length
+
+    @property
+    def real(self):
+        """
+        real is a property
+        This is the getter method
+        """
+        return self._real
+
+    @property
+    def imag(self):
+        """
+        imag is a property
+        This is the getter method
+        """
+        return self._imag
+
+    @staticmethod
+    def from_circuit(circuit):
+        """
+        Builds the operator of a circuit. Operators are cached by the steps of the circuit, so building
+        the same one again costs nothing.
+
+        :param circuit: Circuit instance.
+        :return: Operator instance. It is shared, and can not be modified.
+        """
+
+        if not isinstance(circuit, Circuit):
+            raise TypeError('The parameter must be a Circuit instance.')
+
+        return Operator._build(circuit.length, circuit.steps)
+
+    @staticmethod
+    def from_sequence(sequence):
+        """
+        Builds the operator of a single sequence, cached as those of circuits are.
+
+        :param sequence: Sequence instance.
+        :return: Operator instance. It is shared, and can not be modified.
+        """
+
+        if not isinstance(sequence, Sequence):
+            raise TypeError('The parameter must be a Sequence instance.')
+
+        return Operator.from_circuit(Circuit([sequence]))
+
+    @staticmethod
+    def identity(length):
+        """
+        Builds the operator that leaves n-qubits as they are, apart from simplifying them.
+
+        :param length: Number of qubits.
+        :return: Operator instance.
+        """
+
+        QuantumState._check_length(length)  # May raise an exception.
+
+        size = pow(2, length)
+
+        return Operator(np.identity(size, dtype=np.int64), np.zeros((size, size), dtype=np.int64))
+
+    def dot(self, other):
+        """
+        Composes two operators: the other one is applied first, and then this one.
+
+        :param other: Operator instance of the same length.
+        :return: New operator.
+        """
+
+        if not isinstance(other, Operator):
+            raise TypeError('The parameter must be an Operator instance.')
+        elif other.length != self.length:
+            raise ValueError('Both operators must have the same length.')
+
+        return Operator(*Kernel.dot(self._real, self._imag, other._real, other._imag))
+
+    def power(self, times):
+        """
+        Raises the operator to a power by repeated squaring, which only takes a logarithmic number of
+        matrix products. Applying the result is the same as applying the operator that many times.
+        Products stay cheap while the entries fit in 64-bit integers. Gates such as H scale the matrix
+        by sqrt(2), which can not be divided back while other gates mix in, so long circuits of them
+        may need arbitrary precision, and much slower products.
+
+        :param times: Exponent, as a whole number.
+        :return: New operator.
+        """
+
+        if not isinstance(times, int):
+            raise TypeError('The exponent must be a whole number.')
+        elif times < 0:
+            raise ValueError('The exponent can not be negative.')
+        else:
+            result = Operator.identity(self.length)
+            square = self
+
+            while times > 0:
+                if times & 1:
+                    result = square.dot(result)
+                times >>= 1
+                if times > 0:
+                    square = square.dot(square)
+
+        return result
+
+    def apply(self, nqubit):
+        """
+        Applies the operator to a n-qubit, which is left as it was.
+
+        :param nqubit: QuantumState instance of the same length.
+        :return: New n-qubit, simplified and with its level computed from scratch.
+        """
+
+        if not isinstance(nqubit, QuantumState):
+            raise TypeError('The parameter must be a QuantumState instance.')
+        elif nqubit.length != self.length:
+            raise ValueError('The length of the operator does not match the number of qubits given.')
+        else:
+            real, imag = Kernel.dot(self._real, self._imag, nqubit.real, nqubit.imag)
+            Kernel.simplify(real, imag)
+
+        return QuantumState.from_parts(*Kernel.narrow(real, imag))
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _build(length, steps):
+        """
+        Builds an operator from compiled steps, by applying them to every state of the basis at once.
+        Each row ends up holding the image of one state, so the result is transposed.
+
+        :param length: Number of qubits.
+        :param steps: Tuple of steps, as given by Circuit.steps.
+        :return: Operator instance.
+        """
+
+        real = np.identity(pow(2, length), dtype=np.int64)
+        imag = np.zeros((pow(2, length),) * 2, dtype=np.int64)
+
+        for parts, target, control_mask, control_value, norm_shift in steps:
+            real, imag = Kernel.widen(real, imag, Kernel.growth(parts))
+            Kernel.apply(real, imag, parts, target, control_mask, control_value)
+
+            # The whole matrix is divided alike, never one row on its own.
+            Kernel.simplify(real.reshape(-1), imag.reshape(-1))
+            real, imag = Kernel.narrow(real, imag)
+
+        return Operator(real.T, imag.T)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from app.model.quantumgate import QuantumGate
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class Optimizer:
+    """
+    Rewrites lists of sequences into shorter ones that leave n-qubits exactly as the original lists
+    would, levels included. Consecutive operations on the same target qubits, with the same controls,
+    are merged into a single matrix, and those that amount to the identity are removed.
+
+    Results are exact because n-qubits are always simplified after a gate: dividing the vector by any
+    power of two in between makes no difference. For that same reason, gates that multiply the whole
+    vector by a power of two are identities, as long as the n-qubit was already simplified beforehand.
+    """
+
+    @staticmethod
+    def optimize(sequences):
+        """
+        Fuses and cancels operations in a list of sequences, before any of them is applied.
+        E.g.: X, X on the same qubit is removed, and so is H, H, as it doubles the whole vector.
+
+        :param sequences: List of sequences, in the order they are to be applied.
+        :return: New list of sequences. Those that could not be fused are kept as they were.
+        """
+
+        if not isinstance(sequences, list) or not all(isinstance(s, Sequence) for s in sequences):
+            raise TypeError('The parameter must be a list of Sequence instances.')
+        elif any(s.length != sequences[0].length for s in sequences):
+            raise ValueError('All sequences must have the same length.')
+        else:
+            # Each entry holds an operation, its accumulated matrix and the sequences it comes from.
+            # Removing an identity may leave two operations next to each other, to be fused as well.
+            stack = []
+
+            for seq in sequences:
+                operation = seq.get_operation()
+                matrix = np.asarray(seq.get_gate().matrix)
+
+                if len(stack) > 0 and stack[-1][0] == operation and stack[-1][1].shape == matrix.shape:
+                    operation, product, fused = stack.pop()
+                    matrix = Optimizer._reduce(matrix.dot(product), operation)
+                    fused = fused + [seq]
+                else:
+                    fused = [seq]
+
+                if not Optimizer._is_identity(matrix, operation):
+                    stack.append((operation, matrix, fused))
+
+            result = [Optimizer._build(*entry) for entry in stack]
+
+        return result
+
+    @staticmethod
+    def _reduce(matrix, operation):
+        """
+        Divides a matrix by the largest power of two shared by all of its entries, if it is applied to
+        the whole vector. Controlled ones are kept, as they do not scale every amplitude alike.
+
+        :param matrix: Numpy array of Gaussian integers.
+        :param operation: Operation, as given by Sequence.get_operation().
+        :return: Numpy array.
+        """
+
+        if operation[1] == 0:
+            while np.any(matrix) and np.array_equal(np.round(matrix / 2), matrix / 2):
+                matrix = matrix / 2
+
+        return matrix
+
+    @staticmethod
+    def _is_identity(matrix, operation):
+        """
+        Determines whether applying a matrix leaves any simplified n-qubit as it was.
+
+        :param matrix: Numpy array of Gaussian integers.
+        :param operation: Operation, as given by Sequence.get_operation().
+        :return: True if the operation can be removed, False otherwise.
+        """
+
+        factor = matrix[0, 0]
+
+        result = np.array_equal(matrix, factor * np.identity(len(matrix)))
+
+        if result:
+            if operation[1] == 0:
+                # A power of two, which is divided again as the n-qubit is simplified.
+                result = factor.imag == 0 and factor.real >= 1 and int(factor.real) & int(factor.real - 1) == 0
+            else:
+                result = factor == 1
+
+        return result
+
+    @staticmethod
+    def _build(operation, matrix, fused):
+        """
+        Turns an entry of the optimized list back into a sequence.
+
+        :param operation: Operation, as given by Sequence.get_operation().
+        :param matrix: Accumulated matrix.
+        :param fused: List of sequences merged into the entry.
+        :return: Sequence instance.
+        """
+
+        if len(fused) == 1:
+            result = fused[0]
+        else:
+            # Named after the gates it is made of, as a product: the last one applied goes first.
+            gate = QuantumGate(np.matrix(matrix, dtype=np.complex_),
+                               '*'.join(s.get_gate().identifier for s in reversed(fused)), operation[1] != 0)
+            result = Sequence(*[gate if isinstance(i, QuantumGate) else i for i in fused[0].array])
+
+        return result
@@ -1,12 +1,38 @@
 # -*- coding: utf-8 -*-
 from math import log
+import weakref
 import numpy as np
 
+from app.model.kernel import Kernel
+
 __author__ = 'Rafael Martin-Cuevas Redondo'
 
 
 class QuantumGate:
-    def __init__(self, matrix, identifier='A'):
+
+    # Kinds of gates, as given by the kind property.
+    GENERAL = 'general'
+    DIAGONAL = 'diagonal'
+    PERMUTATION = 'permutation'
+
+    # Registry of gates: each distinct gate gets the next code, which is kept for good, so that equal
+    # gates always share it. Instances are only held weakly, so that those made on the fly (fused or
+    # inverse gates) are freed once nothing uses them.
+    _codes = {}
+    _gates = {}
+
+    # Gates that can not use controls, as checked by can_use_controls().
+    _UNCONTROLLABLE = (np.array([[1, 1], [1, -1]]), np.array([[-1, 1], [1, 1]]))
+
+    def __init__(self, matrix, identifier='A', controllable=None):
+        """
+        Defines a quantum gate through its matrix.
+
+        :param matrix: Numpy 2D matrix, of size 2^n.
+        :param identifier: Name of the gate.
+        :param controllable: Whether the gate can use control qubits. By default, it is decided
+            from the matrix by can_use_controls().
+        """
 
         if not isinstance(matrix, np.matrix):
             raise TypeError("The gate's matrix must be a Numpy 2D matrix.")
@@ -18,16 +44,67 @@ class QuantumGate:
             raise TypeError('The provided identifier must be a string.')
         elif len(identifier) < 1:
             raise ValueError('The identifier must have a minimum length of 1.')
+        elif controllable is not None and not isinstance(controllable, bool):
+            raise TypeError('The controllable flag must be a boolean.')
         else:
             self._length = int(log(len(matrix), 2))
             self._identifier = identifier
             self._matrix = matrix
+            self._parts = None
+            self._inverse = None
+            self._norm_shift = self._compute_norm_shift(matrix)
+
+            if controllable is None:
+                controllable = self.can_use_controls(matrix)
+            self._controllable = controllable
+
+            self._kind = self._compute_kind(matrix)
+            self._code = QuantumGate._register(self)
 
     def _get_matrix(self):
         return self._matrix
 
     matrix = property(_get_matrix)
 
+    def _get_parts(self):
+        if self._parts is None:
+            self._parts = Kernel.split(self._matrix)
+        return self._parts
+
+    parts = property(_get_parts)
+
+    def _get_kind(self):
+        return self._kind
+
+    # Diagonal and permutation gates only hold powers of i, so kernels apply them without products.
+    kind = property(_get_kind)
+
+    def _get_code(self):
+        return self._code
+
+    # Gates with the same matrix, identifier and controls share their code, and only them.
+    code = property(_get_code)
+
+    def _get_inverse(self):
+        if self._inverse is None and self._norm_shift is not None:
+            self._inverse = QuantumGate._find_inverse(self)
+            if self._inverse._inverse is None:
+                self._inverse._inverse = self
+        return self._inverse
+
+    # Gate that undoes this one, up to a power of two. None if there is no such gate.
+    inverse = property(_get_inverse)
+
+    def _get_norm_shift(self):
+        return self._norm_shift
+
+    norm_shift = property(_get_norm_shift)
+
+    def _get_controllable(self):
+        return self._controllable
+
+    controllable = property(_get_controllable)
+
     def _get_identifier(self):
         return self._identifier
 
@@ -59,15 +136,7 @@ class QuantumGate:
         :return: True if both instances are equal.
         """
 
-        result = True
-
-        if not isinstance(other, QuantumGate) \
-                or not np.array_equal(self.matrix, other.matrix) \
-                or self.length != other.length \
-                or self.identifier != other.identifier:
-            result = False
-
-        return result
+        return isinstance(other, QuantumGate) and self._code == other._code
 
     def __ne__(self, other):
         """
@@ -79,6 +148,75 @@ class QuantumGate:
 
         return not self == other
 
+    def __hash__(self):
+        """
+        Hashes the gate through its code, so that equal gates share their hash.
+
+        :return: Whole number.
+        """
+
+        return self._code
+
+    @staticmethod
+    def from_code(code):
+        """
+        Gives a gate registered with a code, among the instances still in use. All of them are equal.
+
+        :param code: Whole number, as given by the code property.
+        :return: Gate instance.
+        """
+
+        if not isinstance(code, int):
+            raise TypeError('The code must be a whole number.')
+
+        result = next(iter(QuantumGate._gates.get(code, ())), None)
+
+        if result is None:
+            raise ValueError('There is no gate in use with that code.')
+
+        return result
+
+    @staticmethod
+    def _register(gate):
+        """
+        Looks a gate up in the registry, gives it a new code if it is not there yet, and adds it to the
+        instances in use with its code.
+
+        :param gate: Gate instance.
+        :return: Code of the gate.
+        """
+
+        # Adding zero turns negative zeros into positive ones, which compare equal anyway.
+        matrix = np.asarray(gate.matrix, dtype=np.complex_) + 0
+        key = (matrix.shape, matrix.tobytes(), gate.identifier, gate.controllable)
+
+        result = QuantumGate._codes.setdefault(key, len(QuantumGate._codes))
+
+        # Weak sets hash their items, so the code must be known beforehand.
+        gate._code = result
+        QuantumGate._gates.setdefault(result, weakref.WeakSet()).add(gate)
+
+        return result
+
+    @staticmethod
+    def _find_inverse(gate):
+        """
+        Finds the gate that undoes another one. As M^H * M equals 2^s times the identity, the conjugate
+        transpose does, up to a power of two. Registered gates are preferred, otherwise a new one is made.
+
+        :param gate: Gate instance, whose norm shift is known.
+        :return: Gate instance.
+        """
+
+        matrix = gate.matrix.getH()
+
+        for other in [next(iter(g), None) for g in list(QuantumGate._gates.values())]:
+            if other is not None and other.controllable == gate.controllable and other.matrix.shape == matrix.shape \
+                    and np.array_equal(other.matrix, matrix):
+                return other
+
+        return QuantumGate(matrix, gate.identifier + "'", gate.controllable)
+
     @staticmethod
     def can_use_controls(matrix):
         """
@@ -88,7 +226,46 @@ class QuantumGate:
         :return: True if control qubits can be used, false otherwise.
         """
 
-        return not np.array_equal(matrix, np.matrix([[1, 1],
-                                                     [1, -1]], dtype=np.complex)) \
-               and not np.array_equal(matrix, np.matrix([[-1, 1],
-                                                         [1, 1]], dtype=np.complex))
+        return not any(np.array_equal(matrix, m) for m in QuantumGate._UNCONTROLLABLE)
+
+    @staticmethod
+    def _compute_kind(matrix):
+        """
+        Classifies a gate by the kernel that applies it, as described by Kernel.monomial().
+
+        :param matrix: Numpy matrix
+        :return: QuantumGate.DIAGONAL, QuantumGate.PERMUTATION or QuantumGate.GENERAL.
+        """
+
+        result = QuantumGate.GENERAL
+
+        if np.array_equal(matrix, np.round(matrix)):
+            monomial = Kernel.monomial(Kernel.split(matrix))
+
+            if monomial is not None and all(source == state for state, (source, turns) in enumerate(monomial)):
+                result = QuantumGate.DIAGONAL
+            elif monomial is not None:
+                result = QuantumGate.PERMUTATION
+
+        return result
+
+    @staticmethod
+    def _compute_norm_shift(matrix):
+        """
+        Finds how the gate scales the squared norm of a vector when applied to all of its states,
+        which is known whenever M^H * M equals 2^s times the identity.
+
+        :param matrix: Numpy matrix
+        :return: Exponent s of that power of two, or None if the gate does not scale norms uniformly.
+        """
+
+        result = None
+
+        product = matrix.getH() * matrix
+        factor = product[0, 0].real
+
+        if factor >= 1 and factor % 1 == 0 and int(factor) & (int(factor) - 1) == 0 \
+                and np.array_equal(product, factor * np.identity(len(matrix))):
+            result = int(factor).bit_length() - 1
+
+        return result
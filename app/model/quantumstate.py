@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+from ast import literal_eval
+from functools import lru_cache
 from math import log
+import struct
 import numpy as np
 
-from app.model.quantumgate import QuantumGate
+from app.model.kernel import Kernel
 from app.model.sequence import Sequence
 
 __author__ = 'Rafael Martin-Cuevas Redondo'
@@ -10,12 +13,35 @@ __author__ = 'Rafael Martin-Cuevas Redondo'
 
 class QuantumState:
 
-    def __init__(self, length, state=0):
+    # When set, every level updated incrementally is checked against a full recomputation.
+    verify_level = False
+
+    # Length from which n-qubits are created in sparse form, unless stated otherwise.
+    SPARSE_LENGTH = 10
+
+    # Sparse n-qubits switch to dense form once more than 1/SPARSE_RATIO of their amplitudes are not null.
+    SPARSE_RATIO = 16
+
+    # Number of threads that apply gates to n-qubits of THREADED_LENGTH qubits or more. One means no threads.
+    threads = 1
+
+    # Length from which dense n-qubits are split into blocks for the threads, smaller ones not being worth it.
+    THREADED_LENGTH = 16
+
+    # Largest magnitude of the parts of the Gaussian integers whose strings are kept in a lookup table.
+    _TABLE_LIMIT = 64
+
+    # Binary header: flags (sparse form), length, bytes per integer, level and number of stored amplitudes.
+    _HEADER = struct.Struct('<BBHqQ')
+
+    def __init__(self, length, state=0, sparse=None):
         """
         Creates the array that represents all "2*length" possible quantum states, given a set of "n" qubits.
 
         :param length: Number of qubits that the n-qubit vector has.
         :param state: Initial classic state for the qubit to start in.
+        :param sparse: Whether to keep only the non-null amplitudes, while there are few of them.
+            By default, only n-qubits of SPARSE_LENGTH qubits or more are sparse.
         """
 
         self._check_length(length)  # May raise an exception.
@@ -28,35 +54,81 @@ class QuantumState:
             # Number of qubits in the sequence.
             self._length = length
 
-            # Vector of n qubits, as Gaussian integers.
-            self._vector = np.matrix(np.zeros(int(pow(2, self.length)), dtype=np.complex_))
+            # Vector of n qubits, as Gaussian integers: real and imaginary parts are kept apart.
+            # In sparse form, they only hold the states listed in the sorted array of indices.
+            if sparse is None:
+                sparse = length >= QuantumState.SPARSE_LENGTH
 
-            # Normalization factor: [sqrt(2)]^(-k). Starts as sqrt(2)^(-0) = 1
-            self._level = 0
+            if sparse:
+                self._indices = np.array([state], dtype=np.int64)
+                self._real = np.ones(1, dtype=np.int64)
+                self._imag = np.zeros(1, dtype=np.int64)
+            else:
+                self._indices = None
+                self._real = np.zeros(int(pow(2, self.length)), dtype=np.int64)
+                self._imag = np.zeros(int(pow(2, self.length)), dtype=np.int64)
 
-            for i in range(1, self.length):
-                self._vector[0, i] = 0.0 + 0.0j  # Initialize each position of the array.
+                self._real[state] = 1  # All n-qubits are initially set to |0>, with no superposition.
 
-            self._vector[0, state] = 1.0 + 0.0j  # All n-qubits are initially set to |0>, with no superposition.
+            # Normalization factor: [sqrt(2)]^(-k). Starts as sqrt(2)^(-0) = 1
+            self._level = 0
 
     @property
     def vector(self):
         """
         vector is a property
         This is the getter method
+        Built from the stored parts as a 1xN Numpy matrix, for compatibility with former versions.
+        It is a read-only copy, not a view: writing to it raises an error instead of being lost, and
+        the n-qubit can only be changed by setting a whole new vector.
         """
-        return self._vector
+        real, imag = self._to_dense()
+        return self._read_only(np.matrix(real + 1j * imag, dtype=np.complex_))
 
     @vector.setter
     def vector(self, vector):
         """
         This is the setter method
         """
-        if not isinstance(vector, np.matrix):
-            raise TypeError("The n-qubit vector must be a Numpy 2D matrix.")
+        if not isinstance(vector, np.ndarray):
+            raise TypeError("The n-qubit vector must be a Numpy array or matrix.")
         else:
-            self._vector = vector
-            self._length = int(log(vector.size, 2))
+            vector = np.asarray(vector).ravel()
+
+            if not np.array_equal(vector, np.round(vector)):
+                raise ValueError("The n-qubit vector must be made of Gaussian integers.")
+            else:
+                self._indices = None
+                self._real = np.round(vector.real).astype(np.int64)
+                self._imag = np.round(vector.imag).astype(np.int64)
+                self._length = int(log(vector.size, 2))
+                self._level = self._compute_level()
+
+    @property
+    def real(self):
+        """
+        real is a property
+        This is the getter method
+        Read-only, as it may be a view of the stored amplitudes.
+        """
+        return self._read_only(self._to_dense()[0])
+
+    @property
+    def imag(self):
+        """
+        imag is a property
+        This is the getter method
+        Read-only, as it may be a view of the stored amplitudes.
+        """
+        return self._read_only(self._to_dense()[1])
+
+    @property
+    def sparse(self):
+        """
+        sparse is a property
+        This is the getter method
+        """
+        return self._indices is not None
 
     @property
     def level(self):
@@ -81,9 +153,40 @@ class QuantumState:
         """
         return self._length
 
+    @property
+    def key(self):
+        """
+        Compact canonical form of the n-qubit, equal for two n-qubits if and only if they are equal.
+        Made of the raw bytes of the level and of both arrays of parts, so that no formatting is needed.
+        Whether those arrays are sparse or dense only depends on the amplitudes, not on how the
+        n-qubit happens to be stored.
+        """
+        indices, real, imag = self._to_sparse()
+
+        if len(indices) * QuantumState.SPARSE_RATIO > pow(2, self.length):
+            indices = None
+            real, imag = self._to_dense()
+
+        real, imag = Kernel.narrow(real, imag)
+
+        if real.dtype == object:
+            # Coefficients beyond 64-bit integers, which can never match a 64-bit n-qubit.
+            result = repr((self.level, None if indices is None else indices.tolist(),
+                           real.tolist(), imag.tolist())).encode()
+        else:
+            result = np.int64(self.level).tobytes() + real.tobytes() + imag.tobytes()
+
+        if indices is None:
+            result = (b'\x00' if real.dtype != object else b'\x01') + result
+        else:
+            result = (b'\x02' if real.dtype != object else b'\x03') + indices.tobytes() + result
+
+        return result
+
     def apply_gate(self, sequence):
         """
-        Applies the specified operation to the n-qubit, if possible.
+        Applies the specified operation to the n-qubit, if possible. The amplitudes are updated in
+        place, so the n-qubit must be copied beforehand if the original is still needed.
 
         :param sequence : Configuration of the operation that is to be applied.
         """
@@ -93,33 +196,64 @@ class QuantumState:
         elif sequence.length != self.length:
             raise ValueError('The length of the sequence does not match the number of qubits given.')
         else:
-            base_matrix = sequence.get_gate().matrix
+            gate = sequence.get_gate()
 
-            if not QuantumGate.can_use_controls(base_matrix):
-                all_sequences = sequence.alter_controls()
-            else:
-                all_sequences = [sequence]
+            self.apply_operation(gate.parts, *sequence.get_operation(), gate.norm_shift)
+
+    def apply_operation(self, parts, target, control_mask, control_value, norm_shift):
+        """
+        Applies a gate that has already been broken down, skipping the checks made by apply_gate().
+        Compiled circuits use it, so that sequences do not have to be read again at every step.
+
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the affected qubit.
+        :param control_mask: Bits that act as controls. Zero means that the gate is uncontrolled.
+        :param control_value: Value those control bits must have.
+        :param norm_shift: How the gate scales squared norms, as given by QuantumGate.norm_shift.
+        """
+
+        # Apply gate to all affected pairs of states at once.
+        self._apply(parts, target, control_mask, control_value)
+
+        # Try to divide all coefficients by two.
+        halvings = int(self._simplify())
+
+        # Go back to 64-bit integers as soon as every coefficient fits again.
+        self._narrow()
+
+        self.level = Kernel.update_levels(self.level, halvings, norm_shift, control_mask, self._compute_level,
+                                          QuantumState.verify_level)
+
+    def _apply(self, parts, target, control_mask, control_value):
+        """
+        Applies a gate to the stored amplitudes, whichever their form.
+
+        :param parts: Gate to be applied, as returned by Kernel.split().
+        :param target: Bit position of the affected qubit.
+        :param control_mask: Bits that act as controls.
+        :param control_value: Value those control bits must have.
+        """
 
-            new_vector = self.vector.copy()
+        # Switch to arbitrary precision if the gate could overflow 64-bit integers.
+        real, imag = Kernel.widen(self._real, self._imag, Kernel.growth(parts))
 
-            # Apply gate.
-            for s in all_sequences:
-                targets = s.get_decimal_states()
+        if self.sparse:
+            self._indices, self._real, self._imag = Kernel.apply_sparse(
+                self._indices, real, imag, parts, target, control_mask, control_value)
 
-                for i in range(2):
-                    new_vector[0, targets[i]] = base_matrix[i, 0] * self.vector[0, targets[0]]\
-                                                + base_matrix[i, 1] * self.vector[0, targets[1]]
-            self.vector = new_vector
+            if len(self._indices) * QuantumState.SPARSE_RATIO > pow(2, self.length):
+                self._densify()
+        else:
+            pool, chunk = self._pool(real)
 
-            # Try to divide all coefficients by two.
-            self._simplify()
+            if pool is None:
+                Kernel.apply(real, imag, parts, target, control_mask, control_value)
+            else:
+                Kernel.apply_chunked(real, imag, parts, target, control_mask, control_value, max(1, chunk // 2),
+                                     pool)
 
-            # Update normalization factor.
-            sum_squares = 0
-            for i in range(int(pow(2, self.length))):
-                sum_squares += self.vector[0, i].real ** 2
-                sum_squares += self.vector[0, i].imag ** 2
-            self.level = int(log(sum_squares, 2))
+            self._real = real
+            self._imag = imag
 
     def copy(self):
         """
@@ -129,48 +263,235 @@ class QuantumState:
         :return: Copied n-qubit.
         """
 
-        result = QuantumState(self.length)
-        result.vector = self.vector.copy()
+        result = QuantumState(self.length, sparse=True)
+        result._indices = None if self._indices is None else self._indices.copy()
+        result._real = self._real.copy()
+        result._imag = self._imag.copy()
         result.level = self.level
         return result
 
-    def to_file(self):
+    @staticmethod
+    def from_parts(real, imag, level=None):
         """
-        Converts the n-qubit to a string format to be exported to file.
+        Builds a n-qubit straight from the real and imaginary parts of its Gaussian integers.
 
-        :return: Resulting string.
+        :param real: Numpy array with the 2^n real parts. It is stored as is, not copied.
+        :param imag: Numpy array with the 2^n imaginary parts. It is stored as is, not copied.
+        :param level: Normalization level. Computed from the coefficients if not given.
+        :return: New n-qubit.
+        """
+
+        if not isinstance(real, np.ndarray) or not isinstance(imag, np.ndarray):
+            raise TypeError('The parts of the n-qubit must be Numpy arrays.')
+        elif real.ndim != 1 or real.shape != imag.shape or log(real.size, 2) % 1 != 0 or real.size == 1:
+            raise ValueError('Both parts must have the same size, a natural power of two.')
+        else:
+            result = QuantumState(int(log(real.size, 2)), sparse=True)
+            result._indices = None
+            result._real = np.ascontiguousarray(real)
+            result._imag = np.ascontiguousarray(imag)
+
+            if level is None:
+                result.level = result._compute_level()
+            else:
+                result.level = level
+
+        return result
+
+    def to_bytes(self):
         """
-        result = '('
+        Converts the n-qubit to a compact binary format, to be stored or sent to another process.
+        After a fixed header come the indices (sparse form only), the real parts and the imaginary parts,
+        as little-endian integers of a fixed width: 8 bytes, or more for arbitrary precision n-qubits.
 
-        for i in range(pow(2, self.length)):
-            number = self.vector[0, i]
-            result += self._complex_to_string(number)
+        :return: Resulting bytes.
+        """
+
+        real, imag = Kernel.narrow(self._real, self._imag)
+
+        if real.dtype == object:
+            width = (max(abs(int(v)).bit_length() for v in real.tolist() + imag.tolist()) + 8) // 8
+            data = b''.join(int(v).to_bytes(width, 'little', signed=True) for v in real.tolist() + imag.tolist())
+        else:
+            width = 8
+            data = real.astype('<i8').tobytes() + imag.astype('<i8').tobytes()
+
+        if self.sparse:
+            data = self._indices.astype('<i8').tobytes() + data
+
+        return self._HEADER.pack(int(self.sparse), self.length, width, self.level, len(real)) + data
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Rebuilds a n-qubit from the binary format given by to_bytes().
+
+        :param data: Bytes to be read.
+        :return: New n-qubit.
+        """
+
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError('The parameter must be a bytes-like object.')
+        elif len(data) < QuantumState._HEADER.size:
+            raise ValueError('The data is too short to hold a n-qubit.')
+        else:
+            flags, length, width, level, count = QuantumState._HEADER.unpack_from(data)
+            offset = QuantumState._HEADER.size
 
-            if i != pow(2, self.length) - 1:
-                result += ','
+            if len(data) != offset + 8 * count * flags + 2 * width * count or width < 8 \
+                    or (flags == 0 and count != pow(2, length)) or flags > 1:
+                raise ValueError('The data does not hold a valid n-qubit.')
 
-        result += ');' + str(self.level)
+            result = QuantumState(length, sparse=True)
+            result.level = level
 
+            if flags == 1:
+                result._indices = np.frombuffer(data, '<i8', count, offset).astype(np.int64)
+                offset += 8 * count
+            else:
+                result._indices = None
+
+            if width == 8:
+                result._real = np.frombuffer(data, '<i8', count, offset).astype(np.int64)
+                result._imag = np.frombuffer(data, '<i8', count, offset + 8 * count).astype(np.int64)
+            else:
+                values = [int.from_bytes(data[i:i + width], 'little', signed=True)
+                          for i in range(offset, offset + 2 * width * count, width)]
+                result._real = np.array(values[:count], dtype=object)
+                result._imag = np.array(values[count:], dtype=object)
+
+        return result
+
+    @staticmethod
+    def from_key(key, length):
+        """
+        Rebuilds a n-qubit from its canonical key, so that keys alone can be sent between processes.
+        Keys are only meant to be read back on the machine that made them.
+
+        :param key: Bytes, as given by the key property.
+        :param length: Number of qubits, which sparse keys do not hold.
+        :return: New n-qubit, stored in the same form as the key.
+        """
+
+        if not isinstance(key, bytes):
+            raise TypeError('The key must be a bytes object.')
+
+        QuantumState._check_length(length)  # May raise an exception.
+
+        if len(key) == 0 or key[0] > 3:
+            raise ValueError('The key does not hold a valid n-qubit.')
+        elif key[0] & 1:
+            # Arbitrary precision coefficients are written as Python literals.
+            level, indices, real, imag = literal_eval(key[1:].decode())
+            real = np.array(real, dtype=object)
+            imag = np.array(imag, dtype=object)
+
+            if indices is not None:
+                indices = np.array(indices, dtype=np.int64)
+        else:
+            data = key[1:]
+            count = pow(2, length)
+            indices = None
+
+            if key[0] == 2:
+                count = (len(data) - 8) // 24
+                indices = np.frombuffer(data, np.int64, count).copy()
+                data = data[8 * count:]
+
+            if len(data) != 8 + 16 * count:
+                raise ValueError('The key does not hold a valid n-qubit of that length.')
+
+            level = int(np.frombuffer(data, np.int64, 1)[0])
+            real = np.frombuffer(data, np.int64, count, 8).copy()
+            imag = np.frombuffer(data, np.int64, count, 8 + 8 * count).copy()
+
+        result = QuantumState(length, sparse=True)
+        result._indices = indices
+        result._real = real
+        result._imag = imag
+        result.level = level
         return result
 
+    @staticmethod
+    def from_file(text):
+        """
+        Rebuilds a n-qubit from the string format given by to_file(), e.g.: (1,i,-1,2-3i);2
+        Each distinct coefficient is parsed only once, and the vector is then assembled with Numpy.
+
+        :param text: String to be read.
+        :return: New n-qubit.
+        """
+
+        if not isinstance(text, str):
+            raise TypeError('The parameter must be a string.')
+
+        text = text.strip()
+        vector, separator, level = text.rpartition(';')
+
+        if separator == '' or not vector.startswith('(') or not vector.endswith(')'):
+            raise ValueError('The string does not follow the format (a,b+ci,...);k')
+        else:
+            tokens, inverse = np.unique(vector[1:-1].split(','), return_inverse=True)
+            values = [QuantumState._string_to_gaussian(t) for t in tokens.tolist()]
+
+            dtype = np.int64
+            if max(max(abs(v[0]), abs(v[1])) for v in values) >= Kernel.INT64_LIMIT:
+                dtype = object
+
+            real = np.array([v[0] for v in values], dtype=dtype)[inverse]
+            imag = np.array([v[1] for v in values], dtype=dtype)[inverse]
+
+            try:
+                level = int(level)
+            except ValueError:
+                raise ValueError('The level must be a whole number.')
+
+        return QuantumState.from_parts(real, imag, level)
+
+    def to_file(self):
+        """
+        Converts the n-qubit to a string format to be exported to file.
+
+        :return: Resulting string.
+        """
+
+        return '(' + self._format(',') + ');' + str(self.level)
+
     def __repr__(self):
         """
         Converts the n-qubit to a string format to be printed.
 
         :return: Resulting string.
         """
-        result = '('
 
-        for i in range(pow(2, self.length)):
-            number = self.vector[0, i]
-            result += self._complex_to_string(number)
+        return '(' + self._format(', ') + ') * sqrt(2)^(' + str(-self.level) + ')'
 
-            if i != pow(2, self.length) - 1:
-                result += ', '
+    def _format(self, separator):
+        """
+        Converts all 2^n amplitudes to strings, joined once. In sparse form, only the non-null ones
+        need to be formatted.
 
-        result += ') * sqrt(2)^(' + str(-self.level) + ')'
+        :param separator: String placed between every two amplitudes.
+        :return: Resulting string.
+        """
 
-        return result
+        if self.sparse:
+            result = ['0'] * pow(2, self.length)
+            for i, text in zip(self._indices.tolist(), self._gaussians_to_strings(self._real, self._imag)):
+                result[i] = text
+        else:
+            result = self._gaussians_to_strings(self._real, self._imag)
+
+        return separator.join(result)
+
+    def __hash__(self):
+        """
+        Hashes the n-qubit through its canonical key.
+
+        :return: Whole number.
+        """
+
+        return hash(self.key)
 
     def __eq__(self, nqubit):
         """
@@ -179,9 +500,21 @@ class QuantumState:
         :return: True if both are equal, False otherwise.
         """
 
-        return nqubit.level == self.level \
-               and nqubit.length == self.length \
-               and np.array_equal(nqubit.vector, self.vector)
+        result = isinstance(nqubit, QuantumState) \
+            and nqubit.level == self.level \
+            and nqubit.length == self.length
+
+        if result:
+            if self.sparse and nqubit.sparse:
+                result = np.array_equal(nqubit._indices, self._indices) \
+                    and np.array_equal(nqubit._real, self._real) \
+                    and np.array_equal(nqubit._imag, self._imag)
+            else:
+                real, imag = self._to_dense()
+                other_real, other_imag = nqubit._to_dense()
+                result = np.array_equal(other_real, real) and np.array_equal(other_imag, imag)
+
+        return result
 
     def __ne__(self, nqubit):
         """
@@ -195,18 +528,114 @@ class QuantumState:
     def _simplify(self):
         """
         Tries to divide the whole vector by two, to ensure that H^2=I.
+
+        :return: Number of times that the vector was divided by two.
         """
-        divide = True
-        while divide:
-            i = 0
-            while i < int(pow(2, self.length)) and divide:
-                divide = self.vector[0, i].real % 2 == 0
-                divide = self.vector[0, i].imag % 2 == 0 and divide
-                i += 1
+        pool, chunk = self._pool(self._real)
 
-            if divide:
-                for i in range(int(pow(2, self.length))):
-                    self.vector[0, i] /= 2
+        if pool is None:
+            result = Kernel.simplify(self._real, self._imag)
+        else:
+            result = Kernel.simplify_chunked(self._real, self._imag, chunk, pool)
+
+        return result
+
+    def _pool(self, array):
+        """
+        Decides whether the stored amplitudes are to be shared among several threads, and how.
+        Arbitrary precision integers are always processed by a single thread, as they hold the GIL.
+
+        :param array: Numpy array with the parts of the amplitudes, as they are about to be processed.
+        :return: Tuple with the pool of threads (None for a single thread) and the amplitudes per block.
+        """
+
+        pool = None
+        chunk = array.size
+
+        if QuantumState.threads > 1 and array.dtype != object \
+                and array.size >= pow(2, QuantumState.THREADED_LENGTH):
+            # A few blocks per thread, so that they stay busy even if some blocks take longer.
+            pool = Kernel.pool(QuantumState.threads)
+            chunk = max(1, array.size // (4 * QuantumState.threads))
+
+        return pool, chunk
+
+    def _narrow(self):
+        """
+        Switches the stored parts back to 64-bit integers, if every one of them fits.
+        """
+        self._real, self._imag = Kernel.narrow(self._real, self._imag)
+
+    def _to_dense(self):
+        """
+        Gives the real and imaginary parts of all 2^n amplitudes, whichever the form of the n-qubit.
+
+        :return: Tuple with both Numpy arrays. They must not be modified, as they may be the ones stored.
+        """
+
+        if self._indices is None:
+            result = (self._real, self._imag)
+        else:
+            real = np.zeros(pow(2, self.length), dtype=self._real.dtype)
+            imag = np.zeros(pow(2, self.length), dtype=self._imag.dtype)
+            real[self._indices] = self._real
+            imag[self._indices] = self._imag
+            result = (real, imag)
+
+        return result
+
+    def _to_sparse(self):
+        """
+        Gives the non-null amplitudes of the n-qubit, whichever the form of the n-qubit.
+
+        :return: Tuple with the sorted Numpy arrays of states, real parts and imaginary parts.
+        """
+
+        if self._indices is None:
+            indices = np.flatnonzero(self._real | self._imag)
+            result = (indices, self._real[indices], self._imag[indices])
+        else:
+            result = (self._indices, self._real, self._imag)
+
+        return result
+
+    def _densify(self):
+        """
+        Switches the n-qubit to dense form, storing all 2^n amplitudes.
+        """
+
+        self._real, self._imag = self._to_dense()
+        self._indices = None
+
+    def _compute_level(self):
+        """
+        Computes the normalization level from scratch, as the binary logarithm of the squared norm.
+
+        :return: Whole number.
+        """
+
+        pool, chunk = self._pool(self._real)
+
+        if pool is None:
+            result = Kernel.floor_log2(Kernel.sum_squares(self._real, self._imag))
+        else:
+            result = Kernel.floor_log2(Kernel.sum_squares_chunked(self._real, self._imag, chunk, pool))
+
+        return result
+
+    @staticmethod
+    def _read_only(array):
+        """
+        Gives a view of an array that can not be used to modify it.
+
+        :param array: Numpy array.
+        :return: Read-only Numpy array.
+        """
+
+        result = array.view()
+        result.setflags(write=False)
+
+        return result
 
     @staticmethod
     def _check_length(length):
@@ -226,6 +655,29 @@ class QuantumState:
 
         return result
 
+    @staticmethod
+    def _string_to_gaussian(text):
+        """
+        Converts a Gaussian integer formatted as a string back to its parts. E.g.: '2-3i' gives (2, -3).
+
+        :param text: String format, as given by _gaussian_to_string().
+        :return: Tuple with the real and imaginary parts.
+        """
+
+        try:
+            if text.endswith('i'):
+                split = max(text.rfind('+'), text.rfind('-'), 0)
+                real = int(text[:split]) if split > 0 else 0
+                imag = text[split:-1]
+                imag = int(imag + '1') if imag in ('', '+', '-') else int(imag)
+            else:
+                real = int(text)
+                imag = 0
+        except ValueError:
+            raise ValueError('Wrong Gaussian integer: ' + text)
+
+        return real, imag
+
     @staticmethod
     def _complex_to_string(number):
         """
@@ -234,26 +686,67 @@ class QuantumState:
         :param number: Complex number.
         :return: String format.
         """
+
+        return QuantumState._gaussian_to_string(number.real, number.imag)
+
+    @staticmethod
+    def _gaussians_to_strings(real, imag):
+        """
+        Converts arrays of Gaussian integers to strings, as _gaussian_to_string() does one at a time.
+        Small ones, which are the vast majority, are taken from a lookup table.
+
+        :param real: Numpy array with the real parts.
+        :param imag: Numpy array with the imaginary parts.
+        :return: List of strings.
+        """
+
+        table = QuantumState._string_table()
+
+        return [table.get(pair) or QuantumState._gaussian_to_string(*pair)
+                for pair in zip(real.tolist(), imag.tolist())]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _string_table():
+        """
+        Builds the lookup table used by _gaussians_to_strings(), created the first time it is needed.
+
+        :return: Dictionary from (real, imaginary) pairs of whole numbers to their strings.
+        """
+
+        values = range(-QuantumState._TABLE_LIMIT, QuantumState._TABLE_LIMIT + 1)
+
+        return {(r, i): QuantumState._gaussian_to_string(r, i) for r in values for i in values}
+
+    @staticmethod
+    def _gaussian_to_string(real, imag):
+        """
+        Converts a Gaussian integer, given by its real and imaginary parts, to a string.
+
+        :param real: Real part.
+        :param imag: Imaginary part.
+        :return: String format.
+        """
         result = ''
 
-        if number.real == 0:
-            if number.imag == 0:
+        if real == 0:
+            if imag == 0:
                 result += '0'
-            elif number.imag == 1:
+            elif imag == 1:
                 result += 'i'
-            elif number.imag == -1:
+            elif imag == -1:
                 result += '-i'
             else:
-                result += str(int(number.imag)) + 'i'
+                result += str(int(imag)) + 'i'
         else:
-            result += str(int(number.real))
-            if number.imag == 1:
+            result += str(int(real))
+            if imag == 1:
                 result += '+i'
-            elif number.imag > 0:
-                result += '+' + str(int(number.imag)) + 'i'
-            elif number.imag == -1:
+            elif imag > 0:
+                result += '+' + str(int(imag)) + 'i'
+            elif imag == -1:
                 result += '-i'
-            elif number.imag < 0:
-                result += str(int(number.imag)) + 'i'
+            elif imag < 0:
+                result += str(int(imag)) + 'i'
 
         return result
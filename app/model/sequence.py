@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import itertools
+import numpy as np
+
 from app.model.quantumgate import QuantumGate
 from app.model.gates import EnumGates
 
@@ -7,6 +10,12 @@ __author__ = 'Rafael Martin-Cuevas Redondo'
 
 class Sequence:
 
+    # Sequences are kept for every member of a family, so they only store a few whole numbers.
+    __slots__ = ('_length', '_target', '_control_mask', '_control_value', '_gate')
+
+    # Qubits that do not act as controls, so the gate is applied whatever their value.
+    WILDCARD = '*'
+
     def __init__(self, *args):
         """
         Allows the user to define how must a quantum gate be applied, by stating which qubits act as controls,
@@ -15,19 +24,24 @@ class Sequence:
         :param args: List of elements in the sequence, the accepted ones go as follows:
          1   : Control qubit, must be set to 1 to activate the gate.
          0   : Control qubit, must be set to 0 to activate the gate (uses NOT gates).
-         'G' : Gate instance, to be applied to one qubit alone.
+         *   : Wildcard, the gate is applied regardless of the value of this qubit.
+         'G' : Gate instance. A gate on k qubits is applied to the k consecutive qubits that start
+               at its position, the first one being the most significant qubit of its matrix.
         """
+        # Gates may also be given through the enumeration.
+        args = [i.gate if isinstance(i, EnumGates) else i for i in args]
+
         count_g = 0
 
         i = 0
         while i < len(args):
 
             # Check type and value of each element of the sequence.
-            if isinstance(args[i], QuantumGate) or isinstance(args[i], EnumGates):
-                if args[i].length != 1:
-                    raise ValueError('The Gate provided affects more than one qubit.')
-            elif args[i] != '0' and args[i] != '1':
-                raise TypeError('Element no. ' + str(i) + ' must either be a control (a 0 or a 1), or a Gate.')
+            if isinstance(args[i], QuantumGate):
+                pass
+            elif args[i] != '0' and args[i] != '1' and args[i] != Sequence.WILDCARD:
+                raise TypeError('Element no. ' + str(i) + ' must either be a control (a 0 or a 1), '
+                                'a wildcard (*), or a Gate.')
 
             # Count number of qubits on which the gate is supposed to be applied.
             if isinstance(args[i], QuantumGate):
@@ -38,16 +52,66 @@ class Sequence:
         if count_g != 1:
             raise ValueError("The sequence must contain exactly one gate.")
 
-        self._seq = []
+        # Controls are packed as bits, the first element of the sequence being the most significant one.
+        self._control_mask = 0
+        self._control_value = 0
+
         for i in args:
-            self._seq.append(i)
+            if isinstance(i, QuantumGate):
+                # Every element after the gate is a single qubit, below the ones it affects.
+                self._gate = i
+                self._target = len(args) - 1 - args.index(i)
+                self._control_mask <<= i.length
+                self._control_value <<= i.length
+            else:
+                self._control_mask <<= 1
+                self._control_value <<= 1
+
+                if i != Sequence.WILDCARD:
+                    self._control_mask |= 1
+                    self._control_value |= int(i)
+
+        self._length = len(args) + self._gate.length - 1
+
+    @staticmethod
+    def _build(gate, length, target, control_mask, control_value):
+        """
+        Creates a sequence straight from its bit masks, skipping the checks of the constructor.
+
+        :param gate: Gate instance.
+        :param length: Total length of the sequence.
+        :param target: Bit position of the (least significant) qubit affected by the gate.
+        :param control_mask: Bits that act as controls.
+        :param control_value: Value those control bits must have.
+        :return: Sequence instance.
+        """
+
+        result = Sequence.__new__(Sequence)
+        result._length = length
+        result._target = target
+        result._control_mask = control_mask
+        result._control_value = control_value
+        result._gate = gate
+        return result
 
     def _get_length(self):
-        return len(self._seq)
+        return self._length
     length = property(_get_length)
 
     def _get_array(self):
-        return self._seq
+        result = []
+
+        for i in range(self._length - 1, -1, -1):
+            if self._target <= i < self._target + self._gate.length:
+                # Gates on several qubits are listed once.
+                if i == self._target:
+                    result.append(self._gate)
+            elif not (self._control_mask >> i) & 1:
+                result.append(Sequence.WILDCARD)
+            else:
+                result.append(str((self._control_value >> i) & 1))
+
+        return result
     array = property(_get_array)
 
     def __repr__(self):
@@ -57,15 +121,41 @@ class Sequence:
         :return: Resulting string.
         """
 
-        result = '['
+        return '[' + ', '.join("'" + str(i) + "'" for i in self.array) + ']'
 
-        for i in self._seq:
-            result += "'" + str(i) + "', "
+    def __eq__(self, other):
+        """
+        Checks whether two sequences apply the same gate in the same way.
 
-        result = result[:-2]
-        result += ']'
+        :param other: Sequence instance.
+        :return: True if both sequences are equal.
+        """
 
-        return result
+        return isinstance(other, Sequence) \
+            and self._length == other._length \
+            and self._target == other._target \
+            and self._control_mask == other._control_mask \
+            and self._control_value == other._control_value \
+            and self._gate == other._gate
+
+    def __ne__(self, other):
+        """
+        Checks whether two sequences are not equal.
+
+        :param other: Sequence instance.
+        :return: True if both sequences are different.
+        """
+
+        return not self == other
+
+    def __hash__(self):
+        """
+        Hashes the sequence through its bit masks and the code of its gate.
+
+        :return: Whole number.
+        """
+
+        return hash((self._length, self._target, self._control_mask, self._control_value, self._gate.code))
 
     def get_gate(self):
         """
@@ -74,65 +164,86 @@ class Sequence:
         :return: Gate object.
         """
 
-        result = None
-
-        for i in self._seq:
-            if isinstance(i, QuantumGate):
-                result = i
-
-        return result
+        return self._gate
 
     def get_decimal_states(self):
         """
         Given certain control qubits, decides which quantum states are going to be affected by the
         quantum gate. E.g.: INPUT |0>|G>|1>, means states |0>|0>|1> and |0>|1>|1>, so OUTPUT = (1, 3).
+        Wildcards affect more than one pair of states, only the one with all of them set to 0 is given.
+        Gates on k qubits affect 2^k states at once, from the one where all of them are 0.
+
+        :return: Tuple made of two elements (2^k for gates on k qubits), the states being affected after
+            this sequence is applied.
+        """
+
+        return tuple(self._control_value | (j << self._target) for j in range(pow(2, self._gate.length)))
+
+    def get_target(self):
+        """
+        Locates the qubit affected by the gate, as a bit position within the quantum states.
+        E.g.: INPUT |0>|G>|1>, the gate affects the middle bit, so OUTPUT = 1.
+
+        :return: Bit position of the target qubit, 0 being the least significant one. For gates on
+            several qubits, the position of the least significant of them.
+        """
+
+        return self._target
 
-        :return: Tuple made of two elements, the two states being affected after this sequence is applied.
+    def get_controls(self):
         """
+        Packs the control qubits of the sequence as a pair of bit masks.
+        E.g.: INPUT |0>|G>|1>, controls are the first and last bits, so OUTPUT = (5, 1).
+        Wildcards are left out of both masks.
 
-        int1 = ''
-        int2 = ''
+        :return: Tuple made of two elements, the bits acting as controls and the value they must have.
+        """
 
-        for i in self._seq:
-            # Turn sequence into binary numbers.
-            if i == '0' or i == '1':
-                int1 += i
-                int2 += i
-            elif isinstance(i, QuantumGate):
-                int1 += '0'
-                int2 += '1'
+        return self._control_mask, self._control_value
 
-        # Turn binary numbers to decimal
-        int1 = int(int1, 2)
-        int2 = int(int2, 2)
+    def get_operation(self):
+        """
+        Describes what the sequence actually does, regardless of how it is written: gates that can not
+        use controls ignore the rest of the qubits.
+        E.g.: INPUT |0>|X>|1>, OUTPUT = (1, 5, 1). INPUT |0>|H>|1>, OUTPUT = (1, 0, 0).
 
-        return int1, int2
+        :return: Tuple with the bit position of the target, the control bits and their values.
+        """
+
+        if self._gate.controllable:
+            result = (self._target, self._control_mask, self._control_value)
+        else:
+            result = (self._target, 0, 0)
+
+        return result
 
     def alter_controls(self):
         """
         Gives all the possible configurations for the sequence, keeping the affected qubit the same.
         E.g.: INPUT |0>|G>|1>, outputs |0>|G>|0>, |0>|G>|1>, |1>|G>|0>, |1>|G>|1>
+        Every other qubit acts as a control in all of them, wildcards included.
 
         :return: List of all possible sequences, with a fixed qubit as the one affected by the gate.
         """
 
-        result = []
-        next_sequence = self.array
+        return list(self.iterate_controls())
+
+    def iterate_controls(self):
+        """
+        Same as alter_controls(), but sequences are built one at a time, as they are requested.
 
-        for n in range(pow(2, self.length - 1)):
-            result.append(Sequence(*next_sequence))
+        :return: Iterator over the sequences, in the same order.
+        """
 
-            i = len(next_sequence) - 1
-            while i >= 0:
-                if next_sequence[i] == '0':
-                    next_sequence[i] = '1'
-                    i = -1
-                else:
-                    if next_sequence[i] == '1':
-                        next_sequence[i] = '0'
-                    i -= 1
+        # Controls below the target keep their place, those above it move past the affected qubits.
+        width = self._gate.length
+        low = (1 << self._target) - 1
 
-        return result
+        control_mask = (pow(2, self._length) - 1) & ~((pow(2, width) - 1) << self._target)
+
+        return (Sequence._build(self._gate, self._length, self._target, control_mask,
+                                ((controls & ~low) << width) | (controls & low))
+                for controls in range(pow(2, self.length - width)))
 
     @staticmethod
     def generate_all_without_gate(length):
@@ -145,24 +256,26 @@ class Sequence:
         :return: List of sequences in array format (as sequences should have a gate).
         """
 
+        return [list(b) for b in Sequence.iterate_without_gate(length)]
+
+    @staticmethod
+    def iterate_without_gate(length):
+        """
+        Same as generate_all_without_gate(), but bits are given one configuration at a time.
+
+        :param length: Number of bits of each configuration.
+        :return: Iterator over tuples of bits, from ('0', ..., '0') to ('1', ..., '1').
+        """
+
         if not isinstance(length, int):
             raise TypeError('The length must be a whole number.')
         elif length <= 0:
             raise ValueError('The length must be positive.')
-        else:
-            # Generate all next controls from ['0', ..., '0'] to ['1', ..., '1'].
-            bits = [[]]
-            for i in range(length):
-                new_bits = []
-                for b in bits:
-                    new_bits.append(b + ['0'])
-                    new_bits.append(b + ['1'])
-                bits = new_bits
 
-        return bits
+        return itertools.product('01', repeat=length)
 
     @staticmethod
-    def generate_all_with_gate(gate, length):
+    def generate_all_with_gate(gate, length, partial=False):
         """
         Generate all the possible ways that a gate can be applied to a n-qubit, considering all
         possible controls as ones and zeros.
@@ -170,9 +283,70 @@ class Sequence:
         :param gate: Gate instance to be applied. Must have a length of one.
         :param length: Total length of the sequence, having in mind that one position will be
             the one to apply the gate on.
+        :param partial: Whether to consider wildcards as well, so that gates may also be partially
+            controlled, or not controlled at all.
         :return: List of sequences.
         """
 
+        return list(Sequence.iterate_with_gate(gate, length, partial=partial))
+
+    @staticmethod
+    def iterate_with_gate(gate, length, start=0, stop=None, partial=False):
+        """
+        Same as generate_all_with_gate(), but sequences are built one at a time, as they are requested.
+        A slice of them can be asked for, so that the enumeration may be split into chunks.
+
+        :param gate: Gate instance to be applied. Must have a length of one.
+        :param length: Total length of the sequences.
+        :param start: Index of the first sequence to be given.
+        :param stop: Index where to stop, not included. All the remaining sequences by default.
+        :param partial: Whether to consider wildcards as well.
+        :return: Iterator over the sequences, in the same order as generate_all_with_gate().
+        """
+
+        if not isinstance(gate, QuantumGate):
+            raise TypeError('The gate must be a Gate instance.')
+        elif gate.length != 1:
+            raise ValueError('The gate must have a length of one.')
+
+        stop = Sequence._check_range(length, start, stop, partial)  # May raise an exception.
+
+        return (Sequence._from_index(gate, length, index, partial) for index in range(start, stop))
+
+    @staticmethod
+    def iterate_states(length, start=0, stop=None, partial=False):
+        """
+        Gives the states affected by each of the sequences of generate_all_with_gate(), in the same
+        order, as get_decimal_states() would, without building any sequence. With wildcards, only the
+        pair where all of them are set to 0 is given, as get_decimal_states() does.
+
+        :param length: Total length of the sequences.
+        :param start: Index of the first sequence to be described.
+        :param stop: Index where to stop, not included. All the remaining sequences by default.
+        :param partial: Whether to consider wildcards as well.
+        :return: Iterator over pairs of states.
+        """
+
+        stop = Sequence._check_range(length, start, stop, partial)  # May raise an exception.
+
+        return ((value, value | (1 << target))
+                for target, control_mask, value in (Sequence._locate(length, i, partial) for i in range(start, stop)))
+
+    @staticmethod
+    def table(gate, length, partial=False):
+        """
+        Describes every sequence given by generate_all_with_gate(), in the same order, without building
+        any of them: the sequence at index r has its gate at position r % length, and its controls are
+        the binary digits of r // length. With wildcards, they are its ternary digits instead, where a
+        2 stands for a wildcard.
+
+        :param gate: Gate instance to be applied. Must have a length of one.
+        :param length: Total length of the sequences.
+        :param partial: Whether to consider wildcards as well.
+        :return: Tuple of Numpy arrays, with the bit position of the target, the bits acting as controls
+            and the value they must have, for each sequence.
+        """
+
         if not isinstance(gate, QuantumGate):
             raise TypeError('The gate must be a Gate instance.')
         elif gate.length != 1:
@@ -181,39 +355,141 @@ class Sequence:
             raise TypeError('The length must be a whole number.')
         elif length <= 0:
             raise ValueError('The length must be positive.')
+        elif not isinstance(partial, bool):
+            raise TypeError('The third parameter must be a boolean.')
         else:
-            if length == 1:
-                result = [Sequence(gate)]
-            else:
-                result = []
+            index = np.arange(Sequence._count(length, partial), dtype=np.int64)
+            targets = length - 1 - index % length
+            values, masks = Sequence._digits(index // length, length - 1, partial)
 
-                # Generate all next controls from ['0', ..., '0'] to ['1', ..., '1'].
-                bits = Sequence.generate_all_without_gate(length - 1)
+            # Controls below the target keep their place, those above it move one bit up.
+            low = (np.int64(1) << targets) - 1
+            values = ((values & ~low) << 1) | (values & low)
+            masks = ((masks & ~low) << 1) | (masks & low)
 
-                # Insert 'G' in the sequence.
-                for b in bits:
-                    result.extend(Sequence._insert_gate_all_positions(b, gate))
+        return targets, masks, values
 
-        return result
+    @staticmethod
+    def from_index(gate, length, index, partial=False):
+        """
+        Builds a single sequence out of those given by generate_all_with_gate().
+
+        :param gate: Gate instance to be applied. Must have a length of one.
+        :param length: Total length of the sequence.
+        :param index: Position of the sequence in the list given by generate_all_with_gate().
+        :param partial: Whether the list considers wildcards as well.
+        :return: Sequence instance.
+        """
+
+        if not isinstance(gate, QuantumGate):
+            raise TypeError('The gate must be a Gate instance.')
+        elif gate.length != 1:
+            raise ValueError('The gate must have a length of one.')
+        elif not isinstance(index, int):
+            raise TypeError('The index must be a whole number.')
+        elif not isinstance(partial, bool):
+            raise TypeError('The fourth parameter must be a boolean.')
+        elif index < 0 or index >= Sequence._count(length, partial):
+            raise ValueError('The index must be within 0 and the number of sequences minus one.')
+
+        return Sequence._from_index(gate, length, index, partial)
 
     @staticmethod
-    def _insert_gate_all_positions(arr, gate):
+    def _from_index(gate, length, index, partial=False):
         """
-        Receives a list of bits where a gate is to be inserted in every possible position,
-        and returns the sequences that can be formed with that criteria.
+        Builds a single sequence out of those given by generate_all_with_gate(), without any checks.
 
-        :param arr: Array of bits where the gate is to be inserted.
-        :return: List of sequences.
+        :param gate: Gate instance to be applied.
+        :param length: Total length of the sequence.
+        :param index: Position of the sequence in the list given by generate_all_with_gate().
+        :param partial: Whether the list considers wildcards as well.
+        :return: Sequence instance.
         """
 
-        result = []
+        return Sequence._build(gate, length, *Sequence._locate(length, index, partial))
+
+    @staticmethod
+    def _locate(length, index, partial=False):
+        """
+        Describes a single sequence out of those given by generate_all_with_gate(), as table() does.
 
-        for i in range(len(arr)):
-            new_seq = arr[:]
-            new_seq.insert(i, gate)
-            result.append(Sequence(*new_seq))
-        new_seq = arr[:]
-        new_seq.append(gate)
-        result.append(Sequence(*new_seq))
+        :param length: Total length of the sequence.
+        :param index: Position of the sequence in the list given by generate_all_with_gate().
+        :param partial: Whether the list considers wildcards as well.
+        :return: Tuple with the bit position of the target, the bits acting as controls and their value.
+        """
 
-        return result
+        target = length - 1 - index % length
+        value, mask = Sequence._digits(index // length, length - 1, partial)
+
+        # Controls below the target keep their place, those above it move one bit up.
+        low = (1 << target) - 1
+
+        return target, ((mask & ~low) << 1) | (mask & low), ((value & ~low) << 1) | (value & low)
+
+    @staticmethod
+    def _digits(controls, length, partial):
+        """
+        Turns the number that encodes the controls of a sequence into bit masks, leaving the gate out.
+
+        :param controls: Whole number, or Numpy array of them.
+        :param length: Number of controls.
+        :param partial: Whether the number is written in base three, where a 2 stands for a wildcard.
+        :return: Tuple with the value of the controls and the bits acting as such.
+        """
+
+        if not partial:
+            value, mask = controls, controls | (pow(2, length) - 1)
+        else:
+            value, mask = controls * 0, controls * 0
+
+            for i in range(length):
+                digit = controls % 3
+                controls = controls // 3
+                value = value | (digit == 1) * (1 << i)
+                mask = mask | (digit != 2) * (1 << i)
+
+        return value, mask
+
+    @staticmethod
+    def _count(length, partial=False):
+        """
+        Counts the sequences given by generate_all_with_gate().
+
+        :param length: Total length of the sequences.
+        :param partial: Whether to consider wildcards as well.
+        :return: Whole number.
+        """
+
+        return pow(3 if partial else 2, length - 1) * length
+
+    @staticmethod
+    def _check_range(length, start, stop, partial=False):
+        """
+        Checks a slice of the sequences given by generate_all_with_gate().
+
+        :param length: Total length of the sequences.
+        :param start: Index of the first sequence.
+        :param stop: Index where to stop, not included, or None for all the remaining sequences.
+        :param partial: Whether to consider wildcards as well.
+        :return: Index where to stop.
+        """
+
+        if not isinstance(length, int):
+            raise TypeError('The length must be a whole number.')
+        elif length <= 0:
+            raise ValueError('The length must be positive.')
+        elif not isinstance(start, int) or (stop is not None and not isinstance(stop, int)):
+            raise TypeError('The indices must be whole numbers.')
+        elif not isinstance(partial, bool):
+            raise TypeError('The partial parameter must be a boolean.')
+        else:
+            total = Sequence._count(length, partial)
+
+            if stop is None:
+                stop = total
+
+            if start < 0 or start > stop or stop > total:
+                raise ValueError('The indices must be within 0 and the number of sequences.')
+
+        return stop
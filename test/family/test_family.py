@@ -0,0 +1,126 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+import os
+import tempfile
+
+from app.family.family import Family
+from app.model.gates import EnumGates
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestFamily(TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.mkdir('data')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    @staticmethod
+    def _export(*args, **kwargs):
+        """
+        Generates a family, and reads back the files it exported.
+
+        :return: Dictionary with the contents of each file, by name.
+        """
+
+        for name in os.listdir('data'):
+            os.remove(os.path.join('data', name))
+
+        with redirect_stdout(StringIO()):
+            Family(*args, **kwargs)
+
+        result = {}
+        for name in os.listdir('data'):
+            with open(os.path.join('data', name)) as file_in:
+                result[name] = file_in.read()
+
+        return result
+
+    @staticmethod
+    def _generate_one_by_one(family, nodes, next_nodes, complexity):
+        """
+        Expands a level of complexity one member, gate and sequence at a time, as a reference for the
+        batched expansion.
+        """
+
+        for g in family._allowed_gates:
+            for n in nodes:
+                parent = family._list[n]
+                redundant = family._redundant(parent, g)
+
+                for index, target, control_mask, control_value in Family._table(g, family.length, family.partial):
+                    if redundant != (target, control_mask, control_value):
+                        child = parent.nqubit.copy()
+                        child.apply_gate(Sequence.from_index(g, family.length, index, family.partial))
+
+                        if not family._contains(child.key):
+                            family._add(parent, g, index, child.key, child, child.level - parent.nqubit.level,
+                                        next_nodes, complexity)
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, Family, 2, 1, processes='')
+        self.failUnlessRaises(ValueError, Family, 2, 1, processes=0)
+
+    def test_processes(self):
+        serial = self._export(2, 4)
+        self.assertEquals(len(serial), 5)
+        self.assertEquals(self._export(2, 4, processes=2), serial)
+
+        serial = self._export(2, 3, partial=True)
+        self.assertEquals(self._export(2, 3, partial=True, processes=2), serial)
+
+    def test__redundant(self):
+        # Skipping redundant operations must never change the family, whichever branch allows them.
+        for args, kwargs in [((1, 6), {}), ((2, 4), {}), ((2, 3), {'partial': True})]:
+            pruned = self._export(*args, **kwargs)
+
+            with patch.object(Family, '_redundant', return_value=None):
+                self.assertEquals(self._export(*args, **kwargs), pruned)
+
+    def test__generate_in_batches(self):
+        for args, kwargs in [((2, 4), {}), ((3, 2), {}), ((2, 3), {'partial': True})]:
+            with patch.object(Family, '_generate_in_batches', TestFamily._generate_one_by_one):
+                expected = self._export(*args, **kwargs)
+
+            self.assertEquals(self._export(*args, **kwargs), expected)
+
+            # Members are split into several batches, whose children must not be told apart either.
+            with patch.object(Family, 'BATCH_AMPLITUDES', 64):
+                self.assertEquals(self._export(*args, **kwargs), expected)
+                self.assertEquals(self._export(*args, processes=2, **kwargs), expected)
+
+    def test__children(self):
+        # Long n-qubits are expanded on their sparse form, which must give the same family.
+        with patch.object(Family, '_generate_in_batches', TestFamily._generate_one_by_one):
+            expected = self._export(3, 3)
+
+        with patch.object(QuantumState, 'SPARSE_LENGTH', 3):
+            self.assertEquals(self._export(3, 3), expected)
+            self.assertEquals(self._export(3, 3, processes=2), expected)
+
+        # Members are stored in the canonical form of their keys, however they were found.
+        for processes in [1, 2]:
+            with redirect_stdout(StringIO()):
+                family = Family(3, 3, processes=processes)
+
+            for key, member in family._list.items():
+                if member.complexity > 0:
+                    self.assertEquals(member.nqubit.sparse, QuantumState.from_key(key, 3).sparse)
+                    self.assertEquals(member.nqubit.key, key)
+
+        parents = [QuantumState(10, 3)]
+        children = list(Family._children(parents, EnumGates.X.gate, 10, False, [None]))
+        # Each target flips the state when its controls hold, and leaves it as it was otherwise.
+        self.assertEquals(len(children), 11)
+        self.assertEquals(children[0][2], parents[0].key)
+        self.assertTrue(parents[0].sparse)
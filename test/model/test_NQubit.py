@@ -2,6 +2,8 @@ from unittest import TestCase
 
 from app.model.quantumstate import QuantumState
 from app.model.quantumgate import QuantumGate
+from app.model.gates import EnumGates
+from app.model.sequence import Sequence
 import numpy as np
 
 __author__ = 'Rafael Martin-Cuevas Redondo'
@@ -63,6 +65,22 @@ class TestNQubit(TestCase):
         self.assertTrue(np.array_equal(self.n3_6.vector, np.matrix([[0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 1.+0.j, 0.+0.j]])))
         self.assertTrue(np.array_equal(self.n3_7.vector, np.matrix([[0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 0.+0.j, 1.+0.j]])))
 
+    def test_vector_setter(self):
+        nqubit = QuantumState(2)
+        nqubit.vector = np.matrix([[1, 1j, -1, 2 - 1j]], dtype=np.complex_)
+        self.assertEquals(nqubit.to_file(), "(1,i,-1,2-i);3")
+
+        nqubit.vector = np.array([0, 1j, 0, 0])
+        self.assertEquals(nqubit.to_file(), "(0,i,0,0);0")
+        self.assertEquals(nqubit.vector.shape, (1, 4))
+        self.assertTrue(isinstance(nqubit.vector, np.matrix))
+
+        # The vector is a copy, so writing to it must fail instead of being lost.
+        self.failUnlessRaises(ValueError, nqubit.vector.__setitem__, (0, 0), 1)
+
+        self.failUnlessRaises(TypeError, setattr, nqubit, 'vector', [1, 0])
+        self.failUnlessRaises(ValueError, setattr, nqubit, 'vector', np.matrix([[0.5, 0.5]]))
+
     def test_factor(self):
         self.assertEquals(self.n1_0.level, 0)
         self.assertEquals(self.n1_1.level, 0)
@@ -95,6 +113,153 @@ class TestNQubit(TestCase):
         self.assertEquals(self.n3_6.length, 3)
         self.assertEquals(self.n3_7.length, 3)
 
+    def test_from_parts(self):
+        nqubit = QuantumState.from_parts(np.array([1, 0, 1, 0]), np.array([0, 1, 0, -1]))
+        self.assertEquals(nqubit.to_file(), "(1,i,1,-i);2")
+
+        self.failUnlessRaises(TypeError, QuantumState.from_parts, [1, 0], np.array([0, 0]))
+        self.failUnlessRaises(ValueError, QuantumState.from_parts, np.array([1, 0]), np.array([0, 0, 0]))
+        self.failUnlessRaises(ValueError, QuantumState.from_parts, np.array([1, 0, 0]), np.array([0, 0, 0]))
+
+    def test_real(self):
+        self.assertTrue(np.array_equal(self.n2_1.real, np.array([0, 1, 0, 0])))
+        self.assertTrue(np.array_equal(QuantumState(2, 1, sparse=True).real, np.array([0, 1, 0, 0])))
+        self.assertFalse(self.n2_1.real.flags.writeable)
+
+    def test_imag(self):
+        self.assertTrue(np.array_equal(self.n2_1.imag, np.zeros(4)))
+        self.assertFalse(self.n2_1.imag.flags.writeable)
+
+    def test_copy(self):
+        copy = self.n2_1.copy()
+        copy.apply_gate(Sequence(EnumGates.H.gate, '0'))
+
+        self.assertEquals(self.n2_1, QuantumState(2, 1))
+        self.assertEquals(copy.to_file(), "(0,1,0,1);1")
+
+    def test_sparse(self):
+        self.assertFalse(self.n3_0.sparse)
+        self.assertTrue(QuantumState(3, sparse=True).sparse)
+        self.assertTrue(QuantumState(QuantumState.SPARSE_LENGTH).sparse)
+        self.assertFalse(QuantumState(QuantumState.SPARSE_LENGTH, sparse=False).sparse)
+
+        sequences = [Sequence('1', '0', EnumGates.X.gate, '1', '0', '1'),
+                     Sequence('1', '0', '1', '1', '0', EnumGates.V.gate),
+                     Sequence('0', EnumGates.H.gate, '0', '0', '0', '0'),
+                     Sequence('1', '0', '1', EnumGates.Z_sym.gate, '0', '1'),
+                     Sequence('0', '0', '0', '0', EnumGates.H_sym.gate, '0'),
+                     Sequence(EnumGates.H.gate, '1', '0', '0', '0', '0')]
+
+        sparse = QuantumState(6, 37, sparse=True)
+        dense = QuantumState(6, 37, sparse=False)
+        for seq in sequences:
+            sparse.apply_gate(seq)
+            dense.apply_gate(seq)
+
+            self.assertEquals(sparse, dense)
+            self.assertEquals(dense, sparse)
+            self.assertEquals(sparse.key, dense.key)
+            self.assertEquals(sparse.level, dense.level)
+            self.assertEquals(sparse.to_file(), dense.to_file())
+            self.assertTrue(np.array_equal(sparse.vector, dense.vector))
+            self.assertEquals(sparse.copy(), dense)
+
+        # Eight amplitudes out of 64 are not null any more, too many for the sparse form.
+        self.assertFalse(sparse.sparse)
+
+    def test_key(self):
+        self.assertEquals(self.n2_1.key, QuantumState(2, 1).key)
+        self.assertNotEqual(self.n2_1.key, self.n2_2.key)
+        self.assertNotEqual(self.n1_0.key, self.n2_0.key)
+
+        nqubit = QuantumState(2, 1)
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+        self.assertNotEqual(nqubit.key, self.n2_1.key)
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+        self.assertEquals(nqubit.key, self.n2_1.key)
+
+        # Arbitrary precision n-qubits that fit in 64-bit integers share the key of their counterparts.
+        wide = QuantumState.from_parts(np.array([0, 1, 0, 0], dtype=object), np.zeros(4, dtype=object))
+        self.assertEquals(wide.key, self.n2_1.key)
+
+        big = QuantumState.from_parts(np.array([pow(2, 70), 0], dtype=object), np.zeros(2, dtype=object))
+        self.assertEquals(big.key, QuantumState.from_parts(np.array([pow(2, 70), 0], dtype=object),
+                                                           np.zeros(2, dtype=object)).key)
+        self.assertNotEqual(big.key, self.n1_0.key)
+
+    def test___hash__(self):
+        self.assertEquals(hash(self.n3_5), hash(QuantumState(3, 5)))
+        self.assertTrue(QuantumState(3, 5) in {self.n3_5})
+        self.assertFalse(QuantumState(3, 4) in {self.n3_5})
+
+    def test_to_bytes(self):
+        nqubit = QuantumState(3, 2)
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0', '0'))
+        nqubit.apply_gate(Sequence('1', EnumGates.V.gate, '0'))
+
+        sparse = QuantumState(6, 2, sparse=True)
+        sparse.apply_gate(Sequence(EnumGates.H.gate, '0', '0', '0', '0', '0'))
+
+        big = QuantumState.from_parts(np.array([pow(2, 70), -pow(2, 65)], dtype=object),
+                                      np.array([0, 1], dtype=object))
+
+        for state in [self.n1_0, self.n3_7, nqubit, sparse, big]:
+            copy = QuantumState.from_bytes(state.to_bytes())
+            self.assertEquals(copy, state)
+            self.assertEquals(copy.level, state.level)
+            self.assertEquals(copy.sparse, state.sparse)
+
+        self.assertEquals(len(self.n3_7.to_bytes()), 20 + 2 * 8 * 8)
+        self.assertEquals(len(sparse.to_bytes()), 20 + 3 * 8 * 2)
+
+    def test_from_bytes(self):
+        data = self.n2_1.to_bytes()
+
+        self.failUnlessRaises(TypeError, QuantumState.from_bytes, '')
+        self.failUnlessRaises(ValueError, QuantumState.from_bytes, data[:10])
+        self.failUnlessRaises(ValueError, QuantumState.from_bytes, data[:-1])
+        self.failUnlessRaises(ValueError, QuantumState.from_bytes, data + b'0')
+
+    def test_from_key(self):
+        nqubit = QuantumState(3, 2)
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0', '0'))
+        nqubit.apply_gate(Sequence('1', '0', EnumGates.V.gate))
+        dense = nqubit.copy()
+        dense.apply_gate(Sequence('0', EnumGates.H.gate, '0'))
+        big = QuantumState.from_parts(np.array([pow(2, 70), 0], dtype=object), np.array([0, -1], dtype=object))
+
+        for state in [self.n1_0, self.n3_5, nqubit, dense, big, QuantumState(12, 7)]:
+            rebuilt = QuantumState.from_key(state.key, state.length)
+            self.assertEquals(rebuilt, state)
+            self.assertEquals(rebuilt.key, state.key)
+            self.assertEquals(rebuilt.to_file(), state.to_file())
+
+        self.failUnlessRaises(TypeError, QuantumState.from_key, '', 2)
+        self.failUnlessRaises(ValueError, QuantumState.from_key, b'', 2)
+        self.failUnlessRaises(ValueError, QuantumState.from_key, self.n2_1.key, 3)
+
+    def test_from_file(self):
+        nqubit = QuantumState(2)
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+        nqubit.apply_gate(Sequence('1', EnumGates.V.gate))
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '1'))
+
+        for state in [self.n1_0, self.n3_5, nqubit]:
+            self.assertEquals(QuantumState.from_file(state.to_file()), state)
+
+        nqubit = QuantumState.from_file('(1,i,-1,2-3i,-5i,4+i,-i,0);6')
+        self.assertEquals(nqubit.to_file(), '(1,i,-1,2-3i,-5i,4+i,-i,0);6')
+
+        nqubit = QuantumState.from_file('(' + str(pow(2, 70)) + ',0);140')
+        self.assertEquals(nqubit.to_file(), '(' + str(pow(2, 70)) + ',0);140')
+
+        self.failUnlessRaises(TypeError, QuantumState.from_file, 0)
+        self.failUnlessRaises(ValueError, QuantumState.from_file, '(1,0)')
+        self.failUnlessRaises(ValueError, QuantumState.from_file, '1,0;0')
+        self.failUnlessRaises(ValueError, QuantumState.from_file, '(1,x);0')
+        self.failUnlessRaises(ValueError, QuantumState.from_file, '(1,0);k')
+        self.failUnlessRaises(ValueError, QuantumState.from_file, '(1,0,0);0')
+
     def test_to_file(self):
         self.assertEquals(self.n1_0.to_file(), "(1,0);0")
         self.assertEquals(self.n1_1.to_file(), "(0,1);0")
@@ -132,6 +297,7 @@ class TestNQubit(TestCase):
         self.assertTrue(self.n1_0 == QuantumState(1,0))
         self.assertFalse(self.n1_0 == QuantumState(1,1))
         self.assertFalse(self.n1_0 == QuantumState(2))
+        self.assertFalse(self.n1_0 == '')
 
         self.assertFalse(self.n1_1 == self.n1_0)
         self.assertTrue(self.n1_1 == QuantumState(1,1))
@@ -163,8 +329,123 @@ class TestNQubit(TestCase):
         self.assertTrue(self.n2_0 != QuantumState(2,3))
         self.assertTrue(self.n2_0 != QuantumState(1))
 
+    def test_apply_gate(self):
+        nqubit = QuantumState(2)
+
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+        self.assertEquals(nqubit.to_file(), "(1,0,1,0);1")
+
+        nqubit.apply_gate(Sequence('1', EnumGates.X.gate))
+        self.assertEquals(nqubit.to_file(), "(1,0,0,1);1")
+
+        nqubit.apply_gate(Sequence('1', EnumGates.V.gate))
+        self.assertEquals(nqubit.to_file(), "(1,0,0,i);1")
+
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '1'))
+        self.assertEquals(nqubit.to_file(), "(1,i,1,-i);2")
+
+        nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+        self.assertEquals(nqubit.to_file(), "(1,0,0,i);1")
+
+        # Coefficients beyond 64-bit integers.
+        big = QuantumState.from_parts(np.array([pow(2, 61) + 1, pow(2, 61) - 1]), np.zeros(2, dtype=np.int64))
+        big.apply_gate(Sequence(EnumGates.H.gate))
+        self.assertEquals(big.to_file(), "(" + str(pow(2, 61)) + ",1);122")
+        self.assertEquals(big._real.dtype, np.int64)
+
+        # Levels tracked incrementally must match a full recomputation.
+        QuantumState.verify_level = True
+        try:
+            for seq in [Sequence(EnumGates.H.gate, '0'), Sequence('1', EnumGates.V.gate),
+                        Sequence('0', EnumGates.H_sym.gate), Sequence(EnumGates.Z_sym.gate, '1')]:
+                nqubit.apply_gate(seq)
+                self.assertEquals(nqubit.level, nqubit._compute_level())
+
+            nqubit.level += 2
+            self.failUnlessRaises(RuntimeError, nqubit.apply_gate, Sequence('0', EnumGates.H.gate))
+        finally:
+            QuantumState.verify_level = False
+
+        # Wildcards apply the gate whatever the value of the qubit, as both controlled sequences would.
+        wildcard = QuantumState(3, 5)
+        expected = QuantumState(3, 5)
+        wildcard.apply_gate(Sequence('*', EnumGates.X.gate, '1'))
+        expected.apply_gate(Sequence('0', EnumGates.X.gate, '1'))
+        expected.apply_gate(Sequence('1', EnumGates.X.gate, '1'))
+        self.assertEquals(wildcard.to_file(), expected.to_file())
+        self.assertEquals(wildcard.to_file(), "(0,0,0,0,0,0,0,1);0")
+
+        # Gates on several qubits, against the controlled sequences they stand for.
+        cnot = QuantumGate(np.matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]],
+                                     dtype=np.complex_), 'CNOT')
+        for state in range(8):
+            for sparse in (True, False):
+                wide = QuantumState(3, state, sparse)
+                expected = QuantumState(3, state, sparse)
+                wide.apply_gate(Sequence('0', cnot))
+                expected.apply_gate(Sequence('0', '1', EnumGates.X.gate))
+                self.assertEquals(wide, expected)
+
+        hadamards = QuantumGate(np.matrix(np.kron(EnumGates.H.gate.matrix, EnumGates.H.gate.matrix)), 'HH')
+        wide = QuantumState(3, 6)
+        expected = QuantumState(3, 6)
+        wide.apply_gate(Sequence(hadamards, '*'))
+        expected.apply_gate(Sequence(EnumGates.H.gate, '0', '0'))
+        expected.apply_gate(Sequence('0', EnumGates.H.gate, '0'))
+        self.assertEquals(wide.to_file(), expected.to_file())
+
+        self.failUnlessRaises(TypeError, nqubit.apply_gate, '')
+        self.failUnlessRaises(ValueError, nqubit.apply_gate, Sequence(EnumGates.X.gate))
+
+    def test_threads(self):
+        sequences = [Sequence(EnumGates.H.gate, '0', '0', '1'), Sequence('0', EnumGates.V.gate, '1', '1'),
+                     Sequence('0', '0', '0', EnumGates.H.gate), Sequence(EnumGates.H_sym.gate, '1', '1', '1'),
+                     Sequence('1', EnumGates.H.gate, '0', '1')]
+        expected = QuantumState(4, 6, sparse=False)
+        for seq in sequences:
+            expected.apply_gate(seq)
+
+        threads, threaded_length = QuantumState.threads, QuantumState.THREADED_LENGTH
+        QuantumState.threads, QuantumState.THREADED_LENGTH = 3, 2
+        try:
+            nqubit = QuantumState(4, 6, sparse=False)
+            self.assertIsNotNone(nqubit._pool(nqubit._real)[0])
+
+            for seq in sequences:
+                nqubit.apply_gate(seq)
+            self.assertEquals(nqubit, expected)
+            self.assertEquals(nqubit.level, expected.level)
+            self.assertEquals(nqubit._compute_level(), expected.level)
+        finally:
+            QuantumState.threads, QuantumState.THREADED_LENGTH = threads, threaded_length
+
     def test__simplify(self):
-        pass
+        nqubit = QuantumState.from_parts(np.array([4, 8, -12, 0]), np.array([0, 4, 0, -16]))
+        nqubit._simplify()
+        self.assertEquals(nqubit.to_file(), "(1,2+i,-3,-4i);8")
+
+        nqubit._simplify()
+        self.assertEquals(nqubit.to_file(), "(1,2+i,-3,-4i);8")
+
+        nqubit = QuantumState.from_parts(np.array([pow(2, 70), 0], dtype=object),
+                                         np.array([0, pow(2, 70)], dtype=object))
+        nqubit._simplify()
+        self.assertEquals(nqubit.to_file(), "(1,i);141")
+
+    def test__gaussians_to_strings(self):
+        real = np.array([0, 0, 0, 0, 1, 2, -3, 100, 0, -100])
+        imag = np.array([0, 1, -1, 5, 0, 1, -1, 7, -100, -1])
+        self.assertEquals(QuantumState._gaussians_to_strings(real, imag),
+                          ['0', 'i', '-i', '5i', '1', '2+i', '-3-i', '100+7i', '-100i', '-100-i'])
+
+        real = np.array([pow(2, 70), 0], dtype=object)
+        imag = np.array([-1, 2], dtype=object)
+        self.assertEquals(QuantumState._gaussians_to_strings(real, imag), [str(pow(2, 70)) + '-i', '2i'])
+
+        # Sparse n-qubits give the same strings as dense ones.
+        nqubit = QuantumState(4, 9, sparse=True)
+        self.assertEquals(nqubit.to_file(), QuantumState(4, 9, sparse=False).to_file())
+        self.assertEquals(str(nqubit), str(QuantumState(4, 9, sparse=False)))
 
     def test__check_length(self):
         self.failUnlessRaises(TypeError, QuantumState._check_length, '')
@@ -0,0 +1,64 @@
+from unittest import TestCase
+import numpy as np
+
+from app.model.algebra import Algebra
+from app.model.gates import EnumGates
+from app.model.quantumgate import QuantumGate
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestAlgebra(TestCase):
+
+    def setUp(self):
+        self.gates = [EnumGates.V.gate, EnumGates.V_sym.gate, EnumGates.X.gate, EnumGates.Z.gate,
+                      EnumGates.Z_sym.gate, EnumGates.H.gate, EnumGates.H_sym.gate]
+        self.algebra = Algebra(self.gates)
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, Algebra, EnumGates.X.gate)
+        self.failUnlessRaises(TypeError, Algebra, [EnumGates.X])
+        self.failUnlessRaises(ValueError, Algebra, [])
+        self.failUnlessRaises(ValueError, Algebra, [EnumGates.X.gate,
+                                                    QuantumGate(np.matrix(np.identity(4), dtype=np.complex_))])
+
+    def test_gates(self):
+        self.assertEquals(self.algebra.gates, self.gates)
+
+    def test_product(self):
+        identity = self.algebra.identity
+
+        self.assertEquals(self.algebra.product(EnumGates.X.gate, EnumGates.X.gate), (identity, 0))
+        self.assertEquals(self.algebra.product(EnumGates.H.gate, EnumGates.H.gate), (identity, 1))
+        self.assertEquals(self.algebra.product(EnumGates.V.gate, EnumGates.V.gate), (EnumGates.Z.gate, 0))
+        self.assertEquals(self.algebra.product(EnumGates.V_sym.gate, EnumGates.V_sym.gate),
+                          (EnumGates.Z_sym.gate, 0))
+
+        # Products that differ by a phase are not the same gate.
+        self.assertEquals(self.algebra.product(EnumGates.V.gate, EnumGates.V_sym.gate), None)
+        self.assertEquals(self.algebra.product(EnumGates.Z.gate, EnumGates.Z_sym.gate), None)
+        self.assertEquals(self.algebra.product(EnumGates.X.gate, EnumGates.Z.gate), None)
+
+        # Applying both gates gives the same n-qubit as applying their product.
+        for first in self.gates:
+            for second in self.gates:
+                product = self.algebra.product(first, second)
+
+                if product is not None:
+                    nqubit = QuantumState(2, 3)
+                    nqubit.apply_gate(Sequence(EnumGates.H.gate, '0'))
+                    expected = nqubit.copy()
+
+                    nqubit.apply_gate(Sequence(first, '0'))
+                    nqubit.apply_gate(Sequence(second, '0'))
+                    if product[0] != self.algebra.identity:
+                        expected.apply_gate(Sequence(product[0], '0'))
+
+                    self.assertEquals(nqubit, expected)
+
+    def test_inverse(self):
+        self.assertEquals(self.algebra.inverse(EnumGates.X.gate), EnumGates.X.gate)
+        self.assertEquals(self.algebra.inverse(EnumGates.H_sym.gate), EnumGates.H_sym.gate)
+        self.assertEquals(self.algebra.inverse(EnumGates.V.gate), None)
@@ -0,0 +1,109 @@
+from unittest import TestCase
+import numpy as np
+
+from app.model.batchquantumstate import BatchQuantumState
+from app.model.gates import EnumGates
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestBatchQuantumState(TestCase):
+
+    def setUp(self):
+        self.states = [QuantumState(3, i) for i in range(8)]
+        self.batch = BatchQuantumState(self.states)
+
+        self.sequences = [
+            Sequence(EnumGates.H.gate, '0', '0'),
+            Sequence('0', EnumGates.V.gate, '1'),
+            Sequence('1', '1', EnumGates.X.gate),
+            Sequence('0', EnumGates.H_sym.gate, '0'),
+            Sequence(EnumGates.Z.gate, '1', '0'),
+            Sequence('0', '0', EnumGates.H.gate),
+            Sequence(EnumGates.H.gate, '1', '1')
+        ]
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, BatchQuantumState, '')
+        self.failUnlessRaises(TypeError, BatchQuantumState, [QuantumState(1), ''])
+        self.failUnlessRaises(ValueError, BatchQuantumState, [])
+        self.failUnlessRaises(ValueError, BatchQuantumState, [QuantumState(1), QuantumState(2)])
+
+    def test_length(self):
+        self.assertEquals(self.batch.length, 3)
+
+    def test_levels(self):
+        self.assertTrue(np.array_equal(self.batch.levels, np.zeros(8)))
+
+    def test___len__(self):
+        self.assertEquals(len(self.batch), 8)
+
+    def test___getitem__(self):
+        for i in range(8):
+            self.assertEquals(self.batch[i], self.states[i])
+
+    def test_apply_gate(self):
+        for seq in self.sequences:
+            self.batch.apply_gate(seq)
+            for s in self.states:
+                s.apply_gate(seq)
+
+            for i in range(len(self.states)):
+                self.assertEquals(self.batch[i], self.states[i])
+                self.assertEquals(self.batch.levels[i], self.states[i].level)
+
+        self.failUnlessRaises(TypeError, self.batch.apply_gate, '')
+        self.failUnlessRaises(ValueError, self.batch.apply_gate, Sequence(EnumGates.X.gate))
+
+    def test_copy(self):
+        copy = self.batch.copy()
+        copy.apply_gate(self.sequences[0])
+
+        self.assertEquals(self.batch[0], self.states[0])
+        self.assertNotEqual(copy[0], self.states[0])
+
+    def test_to_list(self):
+        self.assertEquals(self.batch.to_list(), self.states)
+
+    def test_expand(self):
+        gate = EnumGates.H.gate
+        sequences = [Sequence(gate, '0', '0'), Sequence('1', gate, '1'), Sequence('0', '1', gate)]
+        operations = [s.get_operation() for s in sequences]
+
+        expanded = self.batch.expand(gate.parts, operations, gate.norm_shift)
+        self.assertEquals(len(expanded), 24)
+
+        for i in range(len(self.states)):
+            for j in range(len(sequences)):
+                expected = self.states[i].copy()
+                expected.apply_gate(sequences[j])
+
+                self.assertEquals(expanded[3 * i + j], expected)
+                self.assertEquals(expanded.levels[3 * i + j], expected.level)
+
+        # The batch itself is left as it was.
+        self.assertEquals(self.batch.to_list(), self.states)
+
+        self.failUnlessRaises(TypeError, self.batch.expand, gate.parts, (2, 0, 0), gate.norm_shift)
+        self.failUnlessRaises(ValueError, self.batch.expand, gate.parts, [], gate.norm_shift)
+
+    def test_distinct(self):
+        batch = BatchQuantumState([self.states[3], self.states[1], self.states[3], self.states[0], self.states[1]])
+
+        self.assertEquals(batch.distinct().tolist(), [0, 1, 3])
+        self.assertEquals(batch.distinct(np.array([False, True, True, True, True])).tolist(), [1, 2, 3])
+        self.assertEquals(batch.distinct(np.zeros(5, dtype=bool)).tolist(), [])
+
+        # N-qubits with the same coefficients but different levels are not the same.
+        other = self.states[3].copy()
+        other.level = 2
+        self.assertEquals(BatchQuantumState([self.states[3], other]).distinct().tolist(), [0, 1])
+
+        # Arbitrary precision batches are compared as well.
+        large = QuantumState.from_parts(np.array([pow(2, 70), 0, 0, 0, 0, 0, 0, 0], dtype=object),
+                                        np.zeros(8, dtype=object))
+        batch = BatchQuantumState([large, self.states[2], large, self.states[2]])
+        self.assertEquals(batch.distinct().tolist(), [0, 1])
+        self.assertEquals(batch[1], self.states[2])
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from app.model.batchquantumstate import BatchQuantumState
+from app.model.circuit import Circuit
+from app.model.gates import EnumGates
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestCircuit(TestCase):
+
+    def setUp(self):
+        self.sequences = [
+            Sequence('0', '0', EnumGates.V.gate),
+            Sequence('0', '0', EnumGates.H.gate),
+            Sequence('0', EnumGates.H.gate, '0'),
+            Sequence('0', '1', EnumGates.V.gate),
+            Sequence(EnumGates.H_sym.gate, '1', '0'),
+            Sequence('1', EnumGates.X.gate, '1'),
+            Sequence('1', EnumGates.X.gate, '1'),
+            Sequence(EnumGates.Z_sym.gate, '0', '1')
+        ]
+        self.circuit = Circuit(self.sequences)
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, Circuit, '')
+        self.failUnlessRaises(TypeError, Circuit, [''])
+        self.failUnlessRaises(ValueError, Circuit, [])
+        self.failUnlessRaises(ValueError, Circuit, [Sequence(EnumGates.X.gate), Sequence('0', EnumGates.X.gate)])
+        self.failUnlessRaises(TypeError, Circuit, self.sequences, 1)
+
+    def test_length(self):
+        self.assertEquals(self.circuit.length, 3)
+
+    def test___len__(self):
+        self.assertEquals(len(self.circuit), 8)
+        self.assertEquals(len(Circuit(self.sequences, True)), 6)
+
+    def test_run(self):
+        for optimize in (False, True):
+            circuit = Circuit(self.sequences, optimize)
+
+            for state in range(8):
+                for times in (0, 1, 3):
+                    expected = QuantumState(3, state)
+                    for i in range(times):
+                        for seq in self.sequences:
+                            expected.apply_gate(seq)
+
+                    nqubit = QuantumState(3, state)
+                    circuit.run(nqubit, times)
+                    self.assertEquals(nqubit, expected)
+                    self.assertEquals(nqubit.level, expected.level)
+
+            # Batches of n-qubits.
+            batch = BatchQuantumState([QuantumState(3, i) for i in range(8)])
+            circuit.run(batch, 2)
+            for state in range(8):
+                nqubit = QuantumState(3, state)
+                circuit.run(nqubit, 2)
+                self.assertEquals(batch[state], nqubit)
+
+        self.failUnlessRaises(TypeError, self.circuit.run, '')
+        self.failUnlessRaises(ValueError, self.circuit.run, QuantumState(2))
+        self.failUnlessRaises(TypeError, self.circuit.run, QuantumState(3), '')
+        self.failUnlessRaises(ValueError, self.circuit.run, QuantumState(3), -1)
@@ -1,5 +1,7 @@
 from unittest import TestCase
+import gc
 import numpy as np
+from app.model.gates import EnumGates
 from app.model.quantumgate import QuantumGate
 
 __author__ = 'Rafael Martin-Cuevas Redondo'
@@ -95,6 +97,91 @@ class TestGate(TestCase):
         for g in self.gates3:
             self.assertTrue(np.array_equal(g.matrix, self.matrix8x8))
 
+    def test_parts(self):
+        for g in self.gates1:
+            self.assertEquals(g.parts, (((1, 0), (1, 0)), ((1, 0), (1, 0))))
+
+        gate = QuantumGate(np.matrix([[0.5, 0], [0, 1]], dtype=np.complex_))
+        self.failUnlessRaises(ValueError, getattr, gate, 'parts')
+
+    def test_norm_shift(self):
+        for g in self.gates1 + self.gates2 + self.gates3:
+            self.assertEquals(g.norm_shift, None)
+
+        self.assertEquals(QuantumGate(np.matrix(np.identity(2), dtype=np.complex_)).norm_shift, 0)
+        self.assertEquals(QuantumGate(np.matrix([[1, 1], [1, -1]], dtype=np.complex_)).norm_shift, 1)
+        self.assertEquals(QuantumGate(np.matrix([[0, 1j], [1, 0]], dtype=np.complex_)).norm_shift, 0)
+        self.assertEquals(QuantumGate(np.matrix([[2, 0], [0, 2]], dtype=np.complex_)).norm_shift, 2)
+        self.assertEquals(QuantumGate(np.matrix([[3, 0], [0, 3]], dtype=np.complex_)).norm_shift, None)
+
+    def test_controllable(self):
+        for g in self.gates1:
+            self.assertTrue(g.controllable)
+
+        hadamard = np.matrix([[1, 1], [1, -1]], dtype=np.complex_)
+        self.assertFalse(QuantumGate(hadamard).controllable)
+        self.assertTrue(QuantumGate(hadamard, 'A', True).controllable)
+        self.assertFalse(QuantumGate(self.matrix2x2, 'A', False).controllable)
+        self.assertFalse(QuantumGate(self.matrix2x2, 'A', False) == QuantumGate(self.matrix2x2, 'A', True))
+        self.failUnlessRaises(TypeError, QuantumGate, self.matrix2x2, 'A', 1)
+
+    def test_kind(self):
+        self.assertEquals(EnumGates.H.gate.kind, QuantumGate.GENERAL)
+        self.assertEquals(EnumGates.H_sym.gate.kind, QuantumGate.GENERAL)
+        self.assertEquals(EnumGates.X.gate.kind, QuantumGate.PERMUTATION)
+        self.assertEquals(EnumGates.V.gate.kind, QuantumGate.DIAGONAL)
+        self.assertEquals(EnumGates.V_sym.gate.kind, QuantumGate.DIAGONAL)
+        self.assertEquals(EnumGates.Z.gate.kind, QuantumGate.DIAGONAL)
+        self.assertEquals(EnumGates.Z_sym.gate.kind, QuantumGate.DIAGONAL)
+        self.assertEquals(QuantumGate(np.matrix([[0, 1j], [-1, 0]], dtype=np.complex_)).kind,
+                          QuantumGate.PERMUTATION)
+        self.assertEquals(QuantumGate(np.matrix([[2, 0], [0, 1]], dtype=np.complex_)).kind,
+                          QuantumGate.GENERAL)
+
+    def test_code(self):
+        self.assertEquals(QuantumGate(self.matrix2x2).code, self.g1a.code)
+        self.assertEquals(QuantumGate(self.matrix2x2.conj()).code, self.g1a.code)
+        self.assertNotEqual(QuantumGate(self.matrix2x2, 'Alpha').code, self.g1a.code)
+        self.assertNotEqual(QuantumGate(self.matrix2x2, 'A', False).code, self.g1a.code)
+        self.assertTrue(QuantumGate.from_code(self.g1a.code) == self.g1a)
+        self.failUnlessRaises(TypeError, QuantumGate.from_code, 'A')
+        self.failUnlessRaises(ValueError, QuantumGate.from_code, -1)
+
+        # Gates that are no longer used are freed, whereas their codes are kept.
+        codes = [QuantumGate(self.matrix2x2, 'Fused' + str(i)).code for i in range(100)]
+        gc.collect()
+
+        self.failUnlessRaises(ValueError, QuantumGate.from_code, codes[0])
+        self.assertEquals(QuantumGate(self.matrix2x2, 'Fused0').code, codes[0])
+
+        # Equal gates keep sharing their code once the first of them is freed.
+        first = QuantumGate(self.matrix2x2, 'W')
+        second = QuantumGate(self.matrix2x2, 'W')
+        del first
+        gc.collect()
+        third = QuantumGate(self.matrix2x2, 'W')
+
+        self.assertEquals(second, third)
+        self.assertEquals(hash(second), hash(third))
+        self.assertTrue(QuantumGate.from_code(second.code) in (second, third))
+        self.assertTrue(QuantumGate.from_code(self.g1a.code) is self.g1a)
+
+    def test___hash__(self):
+        self.assertEquals(hash(QuantumGate(self.matrix4x4, 'Beta')), hash(self.g3b))
+        self.assertEquals(len({self.g1a, QuantumGate(self.matrix2x2), self.g2a}), 2)
+
+    def test_inverse(self):
+        self.assertTrue(EnumGates.X.gate.inverse is EnumGates.X.gate)
+        self.assertTrue(EnumGates.H.gate.inverse is EnumGates.H.gate)
+        self.assertTrue(EnumGates.Z_sym.gate.inverse is EnumGates.Z_sym.gate)
+
+        inverse = EnumGates.V.gate.inverse
+        self.assertTrue(np.array_equal(inverse.matrix, np.matrix([[1, 0], [0, -1j]])))
+        self.assertEquals(inverse.identifier, "V'")
+        self.assertTrue(inverse.inverse is EnumGates.V.gate)
+
+        self.assertEquals(QuantumGate(np.matrix([[1, 1], [0, 1]], dtype=np.complex_)).inverse, None)
+
     def test_identifier(self):
         identifiers = ['A', 'Alpha', 'Beta', 'Gamma', 'Delta', 'Eta', 'Theta']
         for g in range(len(identifiers)):
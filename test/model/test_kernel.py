@@ -0,0 +1,288 @@
+from unittest import TestCase
+import numpy as np
+
+from app.model.kernel import Kernel
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestKernel(TestCase):
+
+    def setUp(self):
+        self.hadamard = Kernel.split(np.matrix([[1, 1],
+                                                [1, -1]], dtype=np.complex_))
+        self.pauli_x = Kernel.split(np.matrix([[0, 1],
+                                               [1, 0]], dtype=np.complex_))
+        self.v = Kernel.split(np.matrix([[1, 0],
+                                         [0, 1j]], dtype=np.complex_))
+
+    def test_apply(self):
+        # Uncontrolled gate on the most significant qubit.
+        real = np.array([1, 2, 3, 4])
+        imag = np.zeros(4, dtype=np.int64)
+        Kernel.apply(real, imag, self.hadamard, 1)
+        self.assertTrue(np.array_equal(real, np.array([4, 6, -2, -2])))
+        self.assertTrue(np.array_equal(imag, np.zeros(4)))
+
+        # Uncontrolled gate on the least significant qubit.
+        real = np.array([1, 2, 3, 4])
+        imag = np.array([0, 1, 0, -1])
+        Kernel.apply(real, imag, self.hadamard, 0)
+        self.assertTrue(np.array_equal(real, np.array([3, -1, 7, -1])))
+        self.assertTrue(np.array_equal(imag, np.array([1, -1, -1, 1])))
+
+        # Fully controlled gate, a single pair is affected.
+        real = np.arange(8)
+        imag = np.zeros(8, dtype=np.int64)
+        Kernel.apply(real, imag, self.pauli_x, 1, 5, 4)
+        self.assertTrue(np.array_equal(real, np.array([0, 1, 2, 3, 6, 5, 4, 7])))
+
+        # Partially controlled gate, the third qubit is ignored.
+        real = np.arange(8)
+        imag = np.zeros(8, dtype=np.int64)
+        Kernel.apply(real, imag, self.v, 0, 2, 2)
+        self.assertTrue(np.array_equal(real, np.array([0, 1, 2, 0, 4, 5, 6, 0])))
+        self.assertTrue(np.array_equal(imag, np.array([0, 0, 0, 3, 0, 0, 0, 7])))
+
+        # Several vectors at once.
+        real = np.array([[1, 0, 0, 0], [0, 0, 0, 1]])
+        imag = np.zeros((2, 4), dtype=np.int64)
+        Kernel.apply(real, imag, self.hadamard, 0)
+        self.assertTrue(np.array_equal(real, np.array([[1, 1, 0, 0], [0, 0, 1, -1]])))
+
+        # Arbitrary precision integers.
+        real = np.array([pow(2, 70), 1], dtype=object)
+        imag = np.array([0, 0], dtype=object)
+        Kernel.apply(real, imag, self.hadamard, 0)
+        self.assertEquals(list(real), [pow(2, 70) + 1, pow(2, 70) - 1])
+
+        # Non-contiguous arrays can not be updated in place.
+        real = np.zeros((4, 2), dtype=np.int64)[:, 0]
+        self.failUnlessRaises(ValueError, Kernel.apply, real, real, self.hadamard, 0)
+
+    def test_apply_sparse(self):
+        # Uncontrolled gate, the pair of an absent state is created.
+        indices, real, imag = Kernel.apply_sparse(np.array([1, 6]), np.array([1, 2]), np.array([0, 1]),
+                                                  self.hadamard, 1)
+        self.assertTrue(np.array_equal(indices, np.array([1, 3, 4, 6])))
+        self.assertTrue(np.array_equal(real, np.array([1, 1, 2, -2])))
+        self.assertTrue(np.array_equal(imag, np.array([0, 0, 1, -1])))
+
+        # Null amplitudes are removed.
+        indices, real, imag = Kernel.apply_sparse(np.array([0, 1]), np.array([1, 1]), np.array([0, 0]),
+                                                  self.hadamard, 0)
+        self.assertTrue(np.array_equal(indices, np.array([0])))
+        self.assertTrue(np.array_equal(real, np.array([2])))
+
+        # Controlled gate, states that do not match the controls are kept as they were.
+        indices, real, imag = Kernel.apply_sparse(np.array([2, 3, 5]), np.array([1, 2, 3]), np.zeros(3, dtype=np.int64),
+                                                  self.pauli_x, 0, 6, 2)
+        self.assertTrue(np.array_equal(indices, np.array([2, 3, 5])))
+        self.assertTrue(np.array_equal(real, np.array([2, 1, 3])))
+
+    def test_apply_chunked(self):
+        # Every block size must give the same result as the whole vector at once.
+        for target in range(4):
+            for control_mask, control_value in ((0, 0), (1 << (3 - target), 0), (15 & ~(1 << target), 5)):
+                expected_real = np.arange(16)
+                expected_imag = np.arange(16)[::-1].copy()
+                Kernel.apply(expected_real, expected_imag, self.hadamard, target, control_mask, control_value)
+
+                for chunk in (1, 2, 3, 8, 64):
+                    real = np.arange(16)
+                    imag = np.arange(16)[::-1].copy()
+                    Kernel.apply_chunked(real, imag, self.hadamard, target, control_mask, control_value, chunk)
+                    self.assertTrue(np.array_equal(real, expected_real))
+                    self.assertTrue(np.array_equal(imag, expected_imag))
+
+    def test_blocks(self):
+        # Target below the block size: several rows per block.
+        self.assertEquals(list(Kernel.blocks(16, 0, 4)), [(slice(0, 4), slice(0, 1)),
+                                                         (slice(4, 8), slice(0, 1))])
+
+        # Target above the block size: each row is split.
+        self.assertEquals(list(Kernel.blocks(16, 3, 4)), [(slice(0, 1), slice(0, 4)),
+                                                         (slice(0, 1), slice(4, 8))])
+
+    def test_apply_exact(self):
+        real = np.array([[1, 1, 0, 0], [1, 0, 1, 0]])
+        imag = np.zeros((2, 4), dtype=np.int64)
+        real, imag, halvings = Kernel.apply_exact(real, imag, self.hadamard, 0)
+        self.assertTrue(np.array_equal(real, np.array([[1, 0, 0, 0], [1, 1, 1, 1]])))
+        self.assertTrue(np.array_equal(halvings, np.array([1, 0])))
+
+        # Amplitudes that could overflow are computed exactly, and narrowed back once they fit.
+        real = np.array([pow(2, 61), pow(2, 61)])
+        imag = np.zeros(2, dtype=np.int64)
+        real, imag, halvings = Kernel.apply_exact(real, imag, self.hadamard, 0)
+        self.assertEquals(real.dtype, np.int64)
+        self.assertTrue(np.array_equal(real, np.array([1, 0])))
+        self.assertEquals(halvings, 62)
+
+    def test_update_levels(self):
+        def compute():
+            return 7
+
+        self.assertEquals(Kernel.update_levels(3, 1, 2, 0, compute), 3)
+        self.assertEquals(Kernel.update_levels(3, 0, 0, 5, compute), 3)
+        self.assertEquals(Kernel.update_levels(3, 0, 2, 5, compute), 7)
+        self.assertEquals(Kernel.update_levels(3, 0, None, 0, compute), 7)
+        self.assertTrue(np.array_equal(Kernel.update_levels(np.array([3, 4]), np.array([1, 0]), 1, 0, compute),
+                                       np.array([2, 5])))
+
+        self.failUnlessRaises(RuntimeError, Kernel.update_levels, 3, 0, 1, 0, compute, True)
+
+    def test_simplify_chunked(self):
+        real = np.array([4, 8, 0, -12])
+        imag = np.array([0, 4, 16, 0])
+        self.assertEquals(Kernel.simplify_chunked(real, imag, 3), 2)
+        self.assertTrue(np.array_equal(real, np.array([1, 2, 0, -3])))
+        self.assertTrue(np.array_equal(imag, np.array([0, 1, 4, 0])))
+
+        self.assertEquals(Kernel.simplify_chunked(real, imag, 3), 0)
+
+    def test_sum_squares_chunked(self):
+        real = np.array([1, 2, 0, -3])
+        imag = np.array([0, 1, 4, 0])
+        self.assertEquals(Kernel.sum_squares_chunked(real, imag, 3), 31)
+        self.assertEquals(Kernel.peak_chunked(real, imag, 3), 4)
+
+    def test_dot(self):
+        a_real = np.array([[1, 2], [0, -1]])
+        a_imag = np.array([[0, 1], [1, 0]])
+        real, imag = Kernel.dot(a_real, a_imag, np.array([3, 1]), np.array([0, -2]))
+        self.assertTrue(np.array_equal(real, np.array([7, -1])))
+        self.assertTrue(np.array_equal(imag, np.array([-3, 5])))
+
+        # Products beyond floating point precision and beyond 64-bit integers are still exact.
+        for big in (pow(2, 55) + 1, pow(2, 70) + 1):
+            real, imag = Kernel.dot(np.array([[big, 0], [0, 1]], dtype=object if big > pow(2, 62) else np.int64),
+                                    np.zeros((2, 2), dtype=np.int64), np.array([1, 1]), np.zeros(2, dtype=np.int64))
+            self.assertEquals(list(real), [big, 1])
+
+    def test_monomial(self):
+        self.assertEquals(Kernel.monomial(self.hadamard), None)
+        self.assertEquals(Kernel.monomial(self.pauli_x), ((1, 0), (0, 0)))
+        self.assertEquals(Kernel.monomial(self.v), ((0, 0), (1, 1)))
+        self.assertEquals(Kernel.monomial((((0, 0), (0, -1)), ((-1, 0), (0, 0)))), ((1, 3), (0, 2)))
+        self.assertEquals(Kernel.monomial((((2, 0), (0, 0)), ((0, 0), (1, 0)))), None)
+        self.assertEquals(Kernel.monomial((((1, 0), (1, 0)), ((0, 0), (0, 0)))), None)
+
+        # The cache does not keep growing with every gate ever applied.
+        for i in range(300):
+            Kernel.monomial((((i, 0), (0, 0)), ((0, 0), (1, 0))))
+        self.assertLessEqual(Kernel.monomial.cache_info().currsize, 256)
+
+        # Swapping and rotating parts gives the same amplitudes as the products would.
+        rotated = ((((0, 0), (0, -1)), ((-1, 0), (0, 0))), self.pauli_x, self.v)
+        matrices = [np.array([[complex(*c) for c in row] for row in parts]) for parts in rotated]
+
+        for parts, matrix in zip(rotated, matrices):
+            for target, control_mask, control_value in [(0, 0, 0), (2, 0, 0), (1, 5, 4), (1, 4, 0)]:
+                real = np.arange(8) - 3
+                imag = np.arange(8)[::-1] * 2
+                vector = real + 1j * imag
+
+                states = [s for s in range(8) if (s & control_mask) == (control_value & control_mask)]
+                for first in [s for s in states if not s & (1 << target)]:
+                    second = first | (1 << target)
+                    vector[[first, second]] = matrix.dot(vector[[first, second]])
+
+                Kernel.apply(real, imag, parts, target, control_mask, control_value)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector))
+
+                real = np.arange(8) - 3
+                imag = np.arange(8)[::-1] * 2
+                Kernel.apply_chunked(real, imag, parts, target, control_mask, control_value, 1)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector))
+
+                indices, real, imag = Kernel.apply_sparse(np.arange(8), np.arange(8) - 3, np.arange(8)[::-1] * 2,
+                                                          parts, target, control_mask, control_value)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector[indices]))
+
+    def test_apply_wide(self):
+        # Gates on two qubits, compared with the product of their matrix on every group of states.
+        swap = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]])
+        general = np.array([[1, 1j, 0, 2], [0, 1, -1, 0], [1, 0, 0, -1j], [3, 0, 1, 1]])
+
+        for matrix in (swap, general):
+            parts = Kernel.split(np.matrix(matrix))
+
+            for target, control_mask, control_value in [(0, 0, 0), (1, 0, 0), (2, 0, 0), (1, 9, 8), (0, 8, 0)]:
+                vector = (np.arange(16) - 5) + 1j * (np.arange(16)[::-1] % 7)
+                bits = 3 << target
+
+                for first in [s for s in range(16) if not s & bits
+                              and (s & control_mask) == (control_value & control_mask)]:
+                    states = [first | (j << target) for j in range(4)]
+                    vector[states] = matrix.dot(vector[states])
+
+                real = np.arange(16) - 5
+                imag = np.arange(16)[::-1] % 7
+                Kernel.apply(real, imag, parts, target, control_mask, control_value)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector))
+
+                real = np.arange(16) - 5
+                imag = np.arange(16)[::-1] % 7
+                Kernel.apply_chunked(real, imag, parts, target, control_mask, control_value, 1)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector))
+
+                indices, real, imag = Kernel.apply_sparse(np.arange(16), np.arange(16) - 5,
+                                                          np.arange(16)[::-1] % 7,
+                                                          parts, target, control_mask, control_value)
+                self.assertTrue(np.array_equal(real + 1j * imag, vector[indices]))
+                self.assertEquals(len(indices), np.count_nonzero(vector))
+
+    def test_split(self):
+        self.assertEquals(self.hadamard, (((1, 0), (1, 0)), ((1, 0), (-1, 0))))
+        self.assertEquals(self.v, (((1, 0), (0, 0)), ((0, 0), (0, 1))))
+        self.failUnlessRaises(ValueError, Kernel.split, np.matrix([[0.5, 0], [0, 1]]))
+
+    def test_growth(self):
+        self.assertEquals(Kernel.growth(self.hadamard), 2)
+        self.assertEquals(Kernel.growth(self.pauli_x), 1)
+        self.assertEquals(Kernel.growth(self.v), 1)
+
+    def test_control_mask(self):
+        self.assertTrue(np.array_equal(Kernel.control_mask(8, 0, 2, 2), np.array([[False], [True],
+                                                                                 [False], [True]])))
+        self.assertTrue(np.array_equal(Kernel.control_mask(8, 2, 1, 1), np.array([[False, True,
+                                                                                  False, True]])))
+        self.assertFalse(Kernel.control_mask(8, 0, 0, 0).flags.writeable)
+
+        # Groups of four states, with controls both above and below the targets.
+        states = np.arange(64).reshape(4, 4, 4)[:, 0, :]
+        for control_mask, control_value in [(0b100001, 0b100000), (0b110011, 0b010001), (0b000010, 0b000010)]:
+            expected = (states & control_mask) == control_value
+            self.assertTrue(np.array_equal(Kernel.control_mask(64, 2, control_mask, control_value, 4), expected))
+
+    def test_axis_masks(self):
+        rows, columns = Kernel.axis_masks(slice(1, 3), slice(0, 4), 2, 0b100001, 0b100001, 4)
+        self.assertTrue(np.array_equal(rows, [False, True]))
+        self.assertTrue(np.array_equal(columns, [False, True, False, True]))
+        self.assertFalse(rows.flags.writeable)
+
+        # Long axes are not kept, however many gates use them.
+        Kernel._cached_axis_mask.cache_clear()
+        Kernel.axis_masks(slice(0, 1), slice(0, 2 * Kernel.CACHED_AXIS_LENGTH), 13, 1, 1)
+        self.assertEquals(Kernel._cached_axis_mask.cache_info().currsize, 1)
+
+    def test_pool(self):
+        self.assertIs(Kernel.pool(2), Kernel.pool(2))
+
+        # Blocks shared among threads must give the same result as one by one.
+        real = np.arange(64)
+        imag = np.arange(64)[::-1].copy()
+        expected_real = real.copy()
+        expected_imag = imag.copy()
+        Kernel.apply(expected_real, expected_imag, self.hadamard, 2, 33, 1)
+        Kernel.apply_chunked(real, imag, self.hadamard, 2, 33, 1, 4, Kernel.pool(2))
+        self.assertTrue(np.array_equal(real, expected_real))
+        self.assertTrue(np.array_equal(imag, expected_imag))
+
+        real = np.array([4, 8, 0, -12, 8])
+        imag = np.array([0, 4, 16, 0, 0])
+        self.assertEquals(Kernel.sum_squares_chunked(real, imag, 2, Kernel.pool(2)), 560)
+        self.assertEquals(Kernel.peak_chunked(real, imag, 2, Kernel.pool(2)), 16)
+        self.assertEquals(Kernel.simplify_chunked(real, imag, 2, Kernel.pool(2)), 2)
+        self.assertTrue(np.array_equal(real, np.array([1, 2, 0, -3, 2])))
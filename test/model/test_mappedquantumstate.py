@@ -0,0 +1,87 @@
+from unittest import TestCase
+import os
+import tempfile
+import numpy as np
+
+from app.model.gates import EnumGates
+from app.model.mappedquantumstate import MappedQuantumState
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestMappedQuantumState(TestCase):
+
+    def setUp(self):
+        self.sequences = [
+            Sequence(EnumGates.H.gate, '0', '0', '1'),
+            Sequence('0', EnumGates.V.gate, '1', '1'),
+            Sequence('1', '0', '1', EnumGates.X.gate),
+            Sequence('0', '1', EnumGates.H_sym.gate, '0'),
+            Sequence(EnumGates.Z.gate, '1', '0', '1'),
+            Sequence('0', '0', '0', EnumGates.H.gate),
+            Sequence(EnumGates.V_sym.gate, '1', '1', '1')
+        ]
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, MappedQuantumState, 'a')
+        self.failUnlessRaises(ValueError, MappedQuantumState, 0)
+        self.failUnlessRaises(ValueError, MappedQuantumState, 2, 4)
+        self.failUnlessRaises(TypeError, MappedQuantumState, 2, 0, None, 'a')
+        self.failUnlessRaises(ValueError, MappedQuantumState, 2, 0, None, 0)
+
+        nqubit = MappedQuantumState(3, 5)
+        self.assertFalse(nqubit.sparse)
+        self.assertEquals(nqubit, QuantumState(3, 5))
+        self.assertEquals(nqubit.chunk, MappedQuantumState.CHUNK)
+
+    def test_vector_setter(self):
+        nqubit = MappedQuantumState(2)
+        nqubit.vector = np.array([1, 1j, -1, 1])
+        self.assertEquals(nqubit.level, 2)
+        self.assertTrue(np.array_equal(nqubit.imag, np.array([0, 1, 0, 0])))
+
+        self.failUnlessRaises(ValueError, setattr, nqubit, 'vector', np.array([1, 0]))
+        self.failUnlessRaises(OverflowError, setattr, nqubit, 'vector', np.array([pow(2, 62), 0, 0, 0]))
+
+    def test_filename(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'nqubit.bin')
+            nqubit = MappedQuantumState(2, 1, filename)
+            nqubit.apply_gate(Sequence('0', EnumGates.H.gate))
+            nqubit.flush()
+
+            self.assertEquals(nqubit.filename, filename)
+            self.assertTrue(np.array_equal(np.fromfile(filename, dtype=np.int64),
+                                           np.array([1, -1, 0, 0, 0, 0, 0, 0])))
+            del nqubit
+
+    def test_copy(self):
+        nqubit = MappedQuantumState(2, 1)
+        copy = nqubit.copy()
+        copy.apply_gate(Sequence('0', EnumGates.H.gate))
+
+        self.assertEquals(nqubit, QuantumState(2, 1))
+        self.assertNotEquals(copy, nqubit)
+        self.assertIsNone(copy.filename)
+
+    def test_apply_gate(self):
+        # Any block size must give the same n-qubits as the states kept in RAM.
+        for chunk in (1, 2, 4, 16):
+            for state in range(16):
+                nqubit = QuantumState(4, state, sparse=False)
+                mapped = MappedQuantumState(4, state, chunk=chunk)
+
+                for seq in self.sequences:
+                    nqubit.apply_gate(seq)
+                    mapped.apply_gate(seq)
+
+                    self.assertEquals(mapped, nqubit)
+                    self.assertEquals(mapped.level, nqubit.level)
+
+        # Amplitudes can not go beyond 64-bit integers.
+        nqubit = MappedQuantumState(1)
+        nqubit.vector = np.array([pow(2, 61), 1])
+        self.failUnlessRaises(OverflowError, nqubit.apply_gate, Sequence(EnumGates.H.gate))
+        self.assertEquals(list(nqubit.real), [pow(2, 61), 1])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+import numpy as np
+
+from app.model.circuit import Circuit
+from app.model.gates import EnumGates
+from app.model.operator import Operator
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestOperator(TestCase):
+
+    def setUp(self):
+        self.sequences = [
+            Sequence('0', '0', EnumGates.V.gate),
+            Sequence('0', '0', EnumGates.H.gate),
+            Sequence('0', EnumGates.H.gate, '0'),
+            Sequence('0', '1', EnumGates.V.gate),
+            Sequence(EnumGates.H_sym.gate, '1', '0'),
+            Sequence('1', EnumGates.X.gate, '1'),
+            Sequence(EnumGates.Z_sym.gate, '0', '1')
+        ]
+        self.circuit = Circuit(self.sequences)
+
+    def test___init__(self):
+        self.failUnlessRaises(TypeError, Operator, '', np.zeros((2, 2)))
+        self.failUnlessRaises(ValueError, Operator, np.zeros((2, 4)), np.zeros((2, 4)))
+        self.failUnlessRaises(ValueError, Operator, np.zeros((3, 3)), np.zeros((3, 3)))
+        self.failUnlessRaises(ValueError, Operator, np.zeros((2, 2)), np.zeros((4, 4)))
+
+        # Common powers of two are removed.
+        operator = Operator(np.array([[2, 2], [2, -2]]), np.zeros((2, 2), dtype=np.int64))
+        self.assertTrue(np.array_equal(operator.real, np.array([[1, 1], [1, -1]])))
+        self.assertEquals(operator.length, 1)
+        self.assertFalse(operator.real.flags.writeable)
+
+    def test_from_sequence(self):
+        operator = Operator.from_sequence(Sequence('1', EnumGates.V.gate))
+        self.assertTrue(np.array_equal(operator.real, np.diag([1, 1, 1, 0])))
+        self.assertTrue(np.array_equal(operator.imag, np.diag([0, 0, 0, 1])))
+
+        operator = Operator.from_sequence(Sequence(EnumGates.H.gate, '1'))
+        self.assertTrue(np.array_equal(operator.real, np.array([[1, 0, 1, 0], [0, 1, 0, 1],
+                                                                [1, 0, -1, 0], [0, 1, 0, -1]])))
+
+        self.failUnlessRaises(TypeError, Operator.from_sequence, '')
+
+    def test_from_circuit(self):
+        self.assertIs(Operator.from_circuit(self.circuit), Operator.from_circuit(Circuit(self.sequences)))
+        self.failUnlessRaises(TypeError, Operator.from_circuit, '')
+
+    def test_dot(self):
+        v = Operator.from_sequence(Sequence(EnumGates.V.gate))
+        self.assertTrue(np.array_equal(v.dot(v).real, np.diag([1, -1])))
+        self.failUnlessRaises(TypeError, v.dot, '')
+        self.failUnlessRaises(ValueError, v.dot, Operator.identity(2))
+
+    def test_power(self):
+        operator = Operator.from_circuit(self.circuit)
+
+        for times in (0, 1, 2, 5, 13):
+            power = operator.power(times)
+
+            for state in range(8):
+                expected = QuantumState(3, state)
+                self.circuit.run(expected, times)
+
+                nqubit = power.apply(QuantumState(3, state))
+                self.assertEquals(nqubit, expected)
+                self.assertEquals(nqubit.level, expected.level)
+
+        self.failUnlessRaises(TypeError, operator.power, '')
+        self.failUnlessRaises(ValueError, operator.power, -1)
+
+    def test_apply(self):
+        operator = Operator.from_circuit(self.circuit)
+        nqubit = QuantumState(3, 2)
+        result = operator.apply(nqubit)
+
+        self.assertEquals(nqubit, QuantumState(3, 2))
+        self.circuit.run(nqubit)
+        self.assertEquals(result, nqubit)
+
+        self.failUnlessRaises(TypeError, operator.apply, '')
+        self.failUnlessRaises(ValueError, operator.apply, QuantumState(2))
@@ -0,0 +1,80 @@
+from unittest import TestCase
+import random
+import numpy as np
+
+from app.model.gates import EnumGates
+from app.model.optimizer import Optimizer
+from app.model.quantumstate import QuantumState
+from app.model.sequence import Sequence
+
+__author__ = 'Rafael Martin-Cuevas Redondo'
+
+
+class TestOptimizer(TestCase):
+
+    def setUp(self):
+        self.gates = [g.gate for g in EnumGates]
+
+    def test_optimize(self):
+        self.failUnlessRaises(TypeError, Optimizer.optimize, '')
+        self.failUnlessRaises(TypeError, Optimizer.optimize, [''])
+        self.failUnlessRaises(ValueError, Optimizer.optimize, [Sequence(EnumGates.X.gate),
+                                                               Sequence('0', EnumGates.X.gate)])
+
+        # Same target and controls: fused into a single matrix.
+        result = Optimizer.optimize([Sequence('0', EnumGates.V.gate), Sequence('0', EnumGates.Z.gate)])
+        self.assertEquals(len(result), 1)
+        self.assertTrue(np.array_equal(result[0].get_gate().matrix, np.matrix([[1, 0], [0, -1j]])))
+        self.assertEquals(result[0].get_gate().identifier, 'Z*V')
+        self.assertTrue(result[0].get_gate().controllable)
+
+        # Different controls, or gates that can not use them along with gates that can: kept apart.
+        sequences = [Sequence('0', EnumGates.V.gate), Sequence('1', EnumGates.V.gate),
+                     Sequence('1', EnumGates.H.gate)]
+        self.assertEquals(Optimizer.optimize(sequences), sequences)
+
+        # Identities are removed, even if they only hold up to a power of two.
+        self.assertEquals(Optimizer.optimize([Sequence('1', EnumGates.X.gate), Sequence('1', EnumGates.X.gate)]), [])
+        self.assertEquals(Optimizer.optimize([Sequence('1', EnumGates.H.gate), Sequence('0', EnumGates.H.gate)]), [])
+        self.assertEquals(Optimizer.optimize([Sequence(EnumGates.Z_sym.gate, '0'),
+                                              Sequence(EnumGates.Z_sym.gate, '0')]), [])
+
+        # A global phase is not an identity.
+        self.assertEquals(len(Optimizer.optimize([Sequence(EnumGates.V.gate), Sequence(EnumGates.V_sym.gate)])), 1)
+
+        # Gates that can not use controls stay that way once fused.
+        result = Optimizer.optimize([Sequence('1', EnumGates.H.gate), Sequence('0', EnumGates.H_sym.gate)])
+        self.assertEquals(len(result), 1)
+        self.assertFalse(result[0].get_gate().controllable)
+
+        # Removing an identity brings together the operations around it.
+        result = Optimizer.optimize([Sequence('0', EnumGates.V.gate), Sequence(EnumGates.X.gate, '1'),
+                                     Sequence(EnumGates.X.gate, '1'), Sequence('0', EnumGates.V.gate)])
+        self.assertEquals(len(result), 1)
+        self.assertTrue(np.array_equal(result[0].get_gate().matrix, np.matrix([[1, 0], [0, -1]])))
+
+    def test_optimize_states(self):
+        # Optimized circuits must give the same n-qubits and levels as the original ones.
+        generator = random.Random(0)
+        for length in (1, 2, 3):
+            for i in range(60):
+                sequences = []
+                for j in range(generator.randint(1, 12)):
+                    gate = generator.choice(self.gates)
+                    target = generator.randrange(length)
+                    controls = [generator.choice('01') for k in range(length - 1)]
+                    sequences.append(Sequence(*(controls[:target] + [gate] + controls[target:])))
+
+                optimized = Optimizer.optimize(sequences)
+                self.assertTrue(len(optimized) <= len(sequences))
+
+                for state in range(pow(2, length)):
+                    expected = QuantumState(length, state)
+                    nqubit = QuantumState(length, state)
+                    for seq in sequences:
+                        expected.apply_gate(seq)
+                    for seq in optimized:
+                        nqubit.apply_gate(seq)
+
+                    self.assertEquals(nqubit, expected)
+                    self.assertEquals(nqubit.level, expected.level)
@@ -2,6 +2,7 @@ import numpy as np
 from unittest import TestCase
 from app.model.sequence import Sequence
 from app.model.quantumgate import QuantumGate
+from app.model.gates import EnumGates
 
 __author__ = 'Rafael Martin-Cuevas Redondo'
 
@@ -29,8 +30,15 @@ class TestSequence(TestCase):
         self.failUnlessRaises(TypeError, Sequence, self.g, 1)           # Integer is not valid.
         self.failUnlessRaises(ValueError, Sequence, self.g, self.g)     # Too many gates.
 
-        gate = QuantumGate(np.matrix(np.identity(4, dtype=np.complex_)))
-        self.failUnlessRaises(ValueError, Sequence, gate)               # 2-qubit gate.
+        self.assertEquals(Sequence('*', self.g, '1').array, ['*', self.g, '1'])
+        self.assertEquals(Sequence('*', self.g, '1').get_controls(), (1, 1))
+        self.assertEquals(Sequence('*', self.g, '1').get_decimal_states(), (1, 3))
+        self.assertEquals(str(Sequence('*', self.g)), "['*', 'A']")
+
+        # Gates on several qubits take as many consecutive positions.
+        gate = QuantumGate(np.matrix(np.identity(4, dtype=np.complex_)), 'B')
+        self.assertEquals(Sequence(gate).length, 2)
+        self.failUnlessRaises(ValueError, Sequence, gate, gate)         # Too many gates.
 
     def test___repr__(self):
         self.assertEquals(str(self.sequence1), "['A']")
@@ -41,6 +49,33 @@ class TestSequence(TestCase):
         self.assertEquals(str(self.sequence3a), "['0', '0', 'A']")
         self.assertEquals(str(self.sequence3b), "['1', '1', 'A']")
 
+    def test_wide_gate(self):
+        gate = QuantumGate(np.matrix(np.identity(4, dtype=np.complex_)), 'B')
+        sequence = Sequence('1', gate, '*', '0')
+
+        self.assertEquals(sequence.length, 5)
+        self.assertEquals(sequence.array, ['1', gate, '*', '0'])
+        self.assertEquals(str(sequence), "['1', 'B', '*', '0']")
+        self.assertEquals(sequence.get_target(), 2)
+        self.assertEquals(sequence.get_controls(), (17, 16))
+        self.assertEquals(sequence.get_decimal_states(), (16, 20, 24, 28))
+        self.assertEquals(Sequence._build(gate, 5, 2, 17, 16), sequence)
+
+        alter = Sequence(gate, '0').alter_controls()
+        self.assertEquals(alter, [Sequence(gate, '0'), Sequence(gate, '1')])
+        self.assertEquals(str(Sequence('0', gate).alter_controls()), "[['0', 'B'], ['1', 'B']]")
+
+    def test___eq__(self):
+        self.assertEquals(self.sequence2c, Sequence('0', self.g))
+        self.assertNotEqual(self.sequence2c, self.sequence2d)
+        self.assertNotEqual(self.sequence2a, self.sequence2c)
+        self.assertNotEqual(self.sequence1, self.g)
+
+    def test___hash__(self):
+        self.assertEquals(hash(self.sequence3b), hash(Sequence('1', '1', self.g)))
+        self.assertEquals(len({self.sequence3a, self.sequence3b, Sequence('0', '0', self.g)}), 2)
+        self.failUnlessRaises(AttributeError, setattr, self.sequence1, 'other', 0)
+
     def test__get_length(self):
         self.assertEquals(self.sequence1.length, 1)
         self.assertEquals(self.sequence2a.length, 2)
@@ -77,6 +112,33 @@ class TestSequence(TestCase):
         self.assertEquals(self.sequence3a.get_decimal_states(), (0, 1))
         self.assertEquals(self.sequence3b.get_decimal_states(), (6, 7))
 
+    def test_get_target(self):
+        self.assertEquals(self.sequence1.get_target(), 0)
+        self.assertEquals(self.sequence2a.get_target(), 1)
+        self.assertEquals(self.sequence2b.get_target(), 1)
+        self.assertEquals(self.sequence2c.get_target(), 0)
+        self.assertEquals(self.sequence2d.get_target(), 0)
+        self.assertEquals(self.sequence3a.get_target(), 0)
+        self.assertEquals(self.sequence3b.get_target(), 0)
+        self.assertEquals(Sequence('0', self.g, '1').get_target(), 1)
+
+    def test_get_controls(self):
+        self.assertEquals(self.sequence1.get_controls(), (0, 0))
+        self.assertEquals(self.sequence2a.get_controls(), (1, 0))
+        self.assertEquals(self.sequence2b.get_controls(), (1, 1))
+        self.assertEquals(self.sequence2c.get_controls(), (2, 0))
+        self.assertEquals(self.sequence2d.get_controls(), (2, 2))
+        self.assertEquals(self.sequence3a.get_controls(), (6, 0))
+        self.assertEquals(self.sequence3b.get_controls(), (6, 6))
+        self.assertEquals(Sequence('0', self.g, '1').get_controls(), (5, 1))
+
+    def test_get_operation(self):
+        self.assertEquals(Sequence('0', EnumGates.X.gate, '1').get_operation(), (1, 5, 1))
+        self.assertEquals(Sequence('*', EnumGates.X.gate, '1').get_operation(), (1, 1, 1))
+
+        # Gates that can not use controls ignore the rest of the qubits.
+        self.assertEquals(Sequence('0', EnumGates.H.gate, '1').get_operation(), (1, 0, 0))
+
     def test_alter_controls(self):
         self.assertEquals(str(self.sequence1.alter_controls()), str([Sequence(self.g)]))
 
@@ -197,3 +259,90 @@ class TestSequence(TestCase):
         self.failUnlessRaises(TypeError, Sequence.generate_all_with_gate, self.g, '')
         self.failUnlessRaises(TypeError, Sequence.generate_all_with_gate, self.g, 0.5)
         self.failUnlessRaises(ValueError, Sequence.generate_all_with_gate, self.g, -1)
+
+    def test_iterate_controls(self):
+        self.assertEquals(list(self.sequence3b.iterate_controls()), self.sequence3b.alter_controls())
+        self.assertEquals(next(self.sequence3b.iterate_controls()), self.sequence3a)
+
+    def test_iterate_without_gate(self):
+        self.failUnlessRaises(TypeError, Sequence.iterate_without_gate, '1')
+        self.failUnlessRaises(ValueError, Sequence.iterate_without_gate, 0)
+
+        for length in range(1, 5):
+            self.assertEquals([list(b) for b in Sequence.iterate_without_gate(length)],
+                              Sequence.generate_all_without_gate(length))
+
+    def test_iterate_with_gate(self):
+        self.failUnlessRaises(TypeError, Sequence.iterate_with_gate, None, 2)
+        self.failUnlessRaises(TypeError, Sequence.iterate_with_gate, self.g, 2, 0.5)
+        self.failUnlessRaises(ValueError, Sequence.iterate_with_gate, self.g, 2, 3, 2)
+        self.failUnlessRaises(ValueError, Sequence.iterate_with_gate, self.g, 2, 0, 5)
+
+        for length in range(1, 5):
+            expected = Sequence.generate_all_with_gate(self.g, length)
+            self.assertEquals(list(Sequence.iterate_with_gate(self.g, length)), expected)
+            self.assertEquals(list(Sequence.iterate_with_gate(self.g, length, 1, length)), expected[1:length])
+
+    def test_iterate_states(self):
+        self.failUnlessRaises(ValueError, Sequence.iterate_states, 0)
+        self.failUnlessRaises(ValueError, Sequence.iterate_states, 3, -1)
+
+        for length in range(1, 5):
+            expected = [s.get_decimal_states() for s in Sequence.generate_all_with_gate(self.g, length)]
+            self.assertEquals(list(Sequence.iterate_states(length)), expected)
+            self.assertEquals(list(Sequence.iterate_states(length, length)), expected[length:])
+
+            expected = [s.get_decimal_states() for s in Sequence.generate_all_with_gate(self.g, length, True)]
+            self.assertEquals(list(Sequence.iterate_states(length, partial=True)), expected)
+            self.assertEquals(list(Sequence.iterate_states(length, length, partial=True)), expected[length:])
+
+        self.failUnlessRaises(TypeError, Sequence.iterate_states, 3, partial=1)
+        self.failUnlessRaises(ValueError, Sequence.iterate_states, 2, 0, 7)
+        self.assertEquals(len(list(Sequence.iterate_states(2, 0, 6, True))), 6)
+
+    def test_table(self):
+        for length in range(1, 5):
+            targets, masks, values = Sequence.table(self.g, length)
+            sequences = Sequence.generate_all_with_gate(self.g, length)
+
+            self.assertEquals(len(targets), len(sequences))
+            for i in range(len(sequences)):
+                self.assertEquals((targets[i], masks[i], values[i]),
+                                  (sequences[i].get_target(),) + sequences[i].get_controls())
+
+        gate = QuantumGate(np.matrix(np.identity(4, dtype=np.complex_)))
+        self.failUnlessRaises(TypeError, Sequence.table, '', 1)
+        self.failUnlessRaises(ValueError, Sequence.table, gate, 1)
+        self.failUnlessRaises(TypeError, Sequence.table, self.g, '')
+        self.failUnlessRaises(ValueError, Sequence.table, self.g, 0)
+
+    def test_generate_all_with_gate_partial(self):
+        for length in range(1, 5):
+            sequences = Sequence.generate_all_with_gate(self.g, length, partial=True)
+            self.assertEquals(len(sequences), pow(3, length - 1) * length)
+            self.assertEquals(len(set(sequences)), len(sequences))
+
+            # Sequences without wildcards come in the same order as in the full enumeration.
+            self.assertEquals([s for s in sequences if '*' not in s.array],
+                              Sequence.generate_all_with_gate(self.g, length))
+
+        self.assertEquals(Sequence.generate_all_with_gate(self.g, 2, True)[5], Sequence('*', self.g))
+
+        targets, masks, values = Sequence.table(self.g, 4, True)
+        for index, seq in enumerate(Sequence.iterate_with_gate(self.g, 4, partial=True)):
+            self.assertEquals(seq, Sequence.from_index(self.g, 4, index, True))
+            self.assertEquals((targets[index], masks[index], values[index]),
+                              (seq.get_target(),) + seq.get_controls())
+
+        self.failUnlessRaises(TypeError, Sequence.table, self.g, 2, 1)
+        self.failUnlessRaises(ValueError, Sequence.from_index, self.g, 2, 6, True)
+
+    def test_from_index(self):
+        for length in range(1, 5):
+            sequences = Sequence.generate_all_with_gate(self.g, length)
+            for i in range(len(sequences)):
+                self.assertEquals(Sequence.from_index(self.g, length, i).array, sequences[i].array)
+
+        self.failUnlessRaises(TypeError, Sequence.from_index, self.g, 2, '')
+        self.failUnlessRaises(ValueError, Sequence.from_index, self.g, 2, 4)
+        self.failUnlessRaises(ValueError, Sequence.from_index, self.g, 2, -1)